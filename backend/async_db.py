@@ -0,0 +1,238 @@
+"""Async Database Facade - keeps SQLite work off the event loop
+
+Reads run on a small dedicated thread pool. Writes are funnelled through one
+writer task that owns a single writer thread; document inserts arriving
+within a short window are grouped into one transaction (group commit), so
+concurrent uploads share a single fsync instead of paying one each.
+
+The synchronous functions in database.py are unchanged and remain the API
+for scripts such as bulk_import.py.
+"""
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+from server_timing import timed
+
+logger = logging.getLogger(__name__)
+
+DB_READ_THREADS = int(os.getenv("DB_READ_THREADS", "4"))
+GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+
+_read_executor = ThreadPoolExecutor(max_workers=DB_READ_THREADS, thread_name_prefix="db-read")
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+
+async def run_read(func, *args, **kwargs):
+    """Run a blocking read on the read pool"""
+    loop = asyncio.get_running_loop()
+    with timed("db"):
+        return await loop.run_in_executor(_read_executor, functools.partial(func, *args, **kwargs))
+
+
+def _reader(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_read(func, *args, **kwargs)
+    return wrapper
+
+
+# Reads
+get_user = _reader(db.get_user)
+user_exists = _reader(db.user_exists)
+email_exists = _reader(db.email_exists)
+get_user_categories = _reader(db.get_user_categories)
+get_user_documents = _reader(db.get_user_documents)
+get_document = _reader(db.get_document)
+get_document_text = _reader(db.get_document_text)
+get_document_blob = _reader(db.get_document_blob)
+get_document_signature = _reader(db.get_document_signature)
+get_all_user_documents = _reader(db.get_all_user_documents)
+get_library_version = _reader(db.get_library_version)
+find_similar_documents = _reader(db.find_similar_documents)
+get_upload_session = _reader(db.get_upload_session)
+get_library_changes = _reader(db.get_library_changes)
+get_dashboard = _reader(db.get_dashboard)
+
+
+class GroupCommitWriter:
+    """Single writer task: batches document inserts, runs other writes in order"""
+
+    def __init__(self, max_delay_ms: float = GROUP_COMMIT_MAX_DELAY_MS, max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.max_delay = max_delay_ms / 1000
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.stats = {"batches": 0, "documents": 0, "largest_batch": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="db-group-commit-writer")
+
+    async def stop(self):
+        """Drain queued writes, then stop the writer task"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, kind: str, payload):
+        """Queue a write and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((kind, payload, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        pending = []  # Item read ahead while collecting a batch
+        while True:
+            item = pending.pop() if pending else await self._queue.get()
+            if item is None:
+                return
+
+            kind, payload, future = item
+            if kind != "insert":
+                await self._run_call(loop, payload, future)
+                continue
+
+            # Collect more inserts until the batch is full or the delay window closes
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if nxt is None or nxt[0] != "insert":
+                    pending.append(nxt)
+                    break
+                batch.append(nxt)
+
+            await self._commit_batch(loop, batch)
+
+    @staticmethod
+    def _resolve(future, result=None, error: Exception | None = None):
+        """Hand a result to a waiting caller, unless it has gone away (e.g. cancelled)"""
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _run_call(self, loop, payload, future):
+        func, args, kwargs = payload
+        try:
+            result = await loop.run_in_executor(_write_executor, functools.partial(func, *args, **kwargs))
+        except Exception as e:
+            self._resolve(future, error=e)
+        else:
+            self._resolve(future, result)
+
+    async def _commit_batch(self, loop, batch: list):
+        # Callers cancelled while queued (e.g. a dropped streaming upload) don't get written
+        batch = [item for item in batch if not item[2].cancelled()]
+        if not batch:
+            return
+        documents = [payload for _, payload, _ in batch]
+        try:
+            await loop.run_in_executor(_write_executor, db.add_documents_batch, documents)
+        except Exception as e:
+            # One bad row must not fail its neighbours: retry each on its own
+            logger.warning(f"Group commit of {len(batch)} documents failed ({e}); retrying individually")
+            for _, payload, future in batch:
+                try:
+                    await loop.run_in_executor(_write_executor, db.add_documents_batch, [payload])
+                except Exception as row_error:
+                    self._resolve(future, error=row_error)
+                else:
+                    self._resolve(future)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["documents"] += len(batch)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for _, _, future in batch:
+            self._resolve(future)
+
+
+writer = GroupCommitWriter()
+
+
+async def _write(func, *args, **kwargs):
+    """Route a write through the writer task, or the write thread if it isn't running"""
+    with timed("db"):
+        if writer.running:
+            return await writer.submit("call", (func, args, kwargs))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_write_executor, functools.partial(func, *args, **kwargs))
+
+
+# Writes
+async def add_document(doc_id: str, username: str, filename: str, category: str, confidence: float,
+                       timestamp: str, text: str, metadata: dict | None = None,
+                       content: bytes | None = None, signature: list | None = None):
+    """Insert a document via group commit; returns once its transaction is committed"""
+    document = {
+        "doc_id": doc_id, "username": username, "filename": filename, "category": category,
+        "confidence": confidence, "timestamp": timestamp, "text": text,
+        "metadata": metadata or {}, "content": content, "signature": signature,
+    }
+    if writer.running:
+        with timed("db"):
+            return await writer.submit("insert", document)
+    return await _write(db.add_documents_batch, [document])
+
+
+async def create_user(username: str, email: str, password_hash: str) -> bool:
+    return await _write(db.create_user, username, email, password_hash)
+
+
+async def delete_document(doc_id: str, username: str) -> bool:
+    return await _write(db.delete_document, doc_id, username)
+
+
+async def bulk_delete_documents(username: str, doc_ids: list | None = None, category: str | None = None) -> int:
+    return await _write(db.bulk_delete_documents, username, doc_ids=doc_ids, category=category)
+
+
+async def bulk_recategorize_documents(username: str, new_category: str, doc_ids: list | None = None,
+                                      category: str | None = None) -> int:
+    return await _write(db.bulk_recategorize_documents, username, new_category, doc_ids=doc_ids, category=category)
+
+
+async def create_upload_session(upload_id: str, username: str, filename: str, size: int, chunk_size: int,
+                                sha256: str | None = None):
+    return await _write(db.create_upload_session, upload_id, username, filename, size, chunk_size, sha256)
+
+
+async def begin_upload_chunk(upload_id: str, chunk_index: int) -> bool:
+    return await _write(db.begin_upload_chunk, upload_id, chunk_index)
+
+
+async def end_upload_chunk(upload_id: str, chunk_index: int, sha256: str | None) -> int:
+    return await _write(db.end_upload_chunk, upload_id, chunk_index, sha256)
+
+
+async def claim_upload_session(upload_id: str, username: str) -> dict | None:
+    return await _write(db.claim_upload_session, upload_id, username)
+
+
+async def release_upload_session(upload_id: str):
+    return await _write(db.release_upload_session, upload_id)
+
+
+async def finish_upload_session(upload_id: str):
+    return await _write(db.finish_upload_session, upload_id)
@@ -0,0 +1,125 @@
+"""Content-Addressed Blob Store for original uploaded files
+
+Files are stored once per SHA-256 under a sharded directory next to app.db:
+
+    blobs/ab/cd/abcd1234...
+
+Reference counts live in the ``blobs`` table (see database.py); this module
+only handles the filesystem side. Writes go to a temp file and are renamed
+into place, so readers never see a partial blob.
+"""
+import os
+import re
+import tempfile
+import time
+
+import storage_paths
+
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(storage_paths.DATA_DIR, "blobs"))
+CHUNK_SIZE = 64 * 1024
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_path(content_hash: str) -> str:
+    """Sharded on-disk path for a content hash"""
+    if not _HASH_RE.match(content_hash):
+        raise ValueError("Invalid content hash")
+    return os.path.join(BLOB_DIR, content_hash[:2], content_hash[2:4], content_hash)
+
+
+def put_blob(content_hash: str, content: bytes) -> str:
+    """Store content under its hash if not already present. Returns the path."""
+    path = blob_path(content_hash)
+    if os.path.exists(path):
+        return path
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def remove_blob(content_hash: str) -> int:
+    """Delete a blob file. Returns the number of bytes freed (0 if missing)."""
+    path = blob_path(content_hash)
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+
+def move_aside(path: str) -> str | None:
+    """Rename a file to a hidden trash name in its directory, to be unlinked later.
+
+    Renaming is a cheap metadata change, so callers holding a lock can do it
+    and leave the slower unlink until after the lock is released. Returns the
+    new path, or None if the file was already gone.
+    """
+    directory, name = os.path.split(path)
+    trash = os.path.join(directory, f".trash-{name}-{os.getpid()}-{time.monotonic_ns()}")
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return None
+    return trash
+
+
+def iter_file_range(path: str, start: int, end: int):
+    """Yield bytes start..end (inclusive) of a file in fixed-size chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(range_header: str, size: int) -> tuple | None:
+    """Parse a single 'bytes=start-end' range. Returns (start, end) or None.
+
+    Raises ValueError for a syntactically valid but unsatisfiable range.
+    Invalid ranges (including last < first, e.g. bytes=5-2) and multi-range
+    requests return None so the caller ignores them and serves the full file.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header or "")
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def iter_stored_files():
+    """Yield (name, path) for every file under BLOB_DIR, including leftover temp files"""
+    for directory, _, names in os.walk(BLOB_DIR):
+        for name in names:
+            yield name, os.path.join(directory, name)
+
+
+def is_blob_name(name: str) -> bool:
+    """True if a file name is a content hash (as opposed to a temp file)"""
+    return bool(_HASH_RE.match(name))
@@ -0,0 +1,251 @@
+"""Bulk Import CLI - load a directory of documents straight into the database
+
+Usage:
+    python -m bulk_import /path/to/documents --user alice [--workers 4] [--batch-size 500]
+
+Extraction and classification run in a multiprocessing pool; results are
+written to SQLite in large batched transactions. Progress is recorded in a
+JSON-lines manifest so an interrupted import can be re-run and will only
+process files that have not been imported yet.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("bulk_import")
+
+import blob_store
+import database as db
+from file_utils import sanitize_filename, get_file_extension, extract_document, build_document_metadata
+from similarity import compute_signature
+
+MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+MIN_TEXT_LENGTH = 50
+
+# Document IDs are derived from (user, path, content hash), so a batch that
+# reached the database but not the manifest is skipped when it is replayed
+DOCUMENT_ID_NAMESPACE = uuid.UUID("6f1c2a4e-9b1d-5c3a-8e7f-2d4b6a8c0e1f")
+
+# Manifest statuses that are not retried on resume
+DONE_STATUSES = {"imported", "skipped"}
+
+# Per-process classifier, created once by the pool initializer
+_classifier = None
+
+
+def _init_worker():
+    """Pool initializer - build one classifier per worker process"""
+    global _classifier
+    from classifier import DocumentClassifier
+    _classifier = DocumentClassifier()
+
+
+def process_file(path: str) -> dict:
+    """Extract and classify a single file (runs inside a worker process)"""
+    result = {"path": path, "filename": sanitize_filename(path)}
+    file_ext = get_file_extension(path)
+
+    try:
+        if os.path.getsize(path) > MAX_FILE_SIZE_BYTES:
+            result.update(status="failed", error=f"exceeds maximum file size of {MAX_FILE_SIZE_MB}MB")
+            return result
+
+        with open(path, "rb") as f:
+            content = f.read()
+
+        text, page_count = extract_document(content, file_ext)
+    except Exception as e:
+        result.update(status="failed", error=str(e)[:200])
+        return result
+
+    if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+        result.update(status="skipped", error="insufficient text")
+        return result
+
+    category, confidence = _classifier.classify(text)
+    metadata = build_document_metadata(content, text, page_count)
+    # Store the original here, so only its hash travels back to the parent
+    try:
+        blob_store.put_blob(metadata["content_hash"], content)
+    except OSError as e:
+        result.update(status="failed", error=str(e)[:200])
+        return result
+    result.update(status="ok", category=category, confidence=confidence, text=text, metadata=metadata,
+                  signature=compute_signature(text))
+    return result
+
+
+def find_documents(root: str) -> list:
+    """Walk a directory and return all supported document paths, sorted"""
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if get_file_extension(name):
+                paths.append(os.path.abspath(os.path.join(dirpath, name)))
+    paths.sort()
+    return paths
+
+
+def load_manifest(manifest_path: str) -> dict:
+    """Load the latest manifest entry per path (later lines win)"""
+    entries = {}
+    if not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Tolerate a truncated last line after a crash
+            entries[entry["path"]] = entry
+    return entries
+
+
+class BulkImporter:
+    """Collects worker results and flushes them to the database in batches"""
+
+    def __init__(self, username: str, manifest_path: str, batch_size: int = 500):
+        self.username = username
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.pending = []
+        self.pending_entries = []
+        self.stats = {"imported": 0, "skipped": 0, "failed": 0}
+
+    def add(self, result: dict):
+        """Queue a worker result, flushing when the batch is full"""
+        status = result["status"]
+        entry = {"path": result["path"], "status": "imported" if status == "ok" else status}
+
+        if status == "ok":
+            doc_id = str(uuid.uuid5(
+                DOCUMENT_ID_NAMESPACE,
+                f"{self.username}\n{result['path']}\n{result['metadata']['content_hash']}"
+            ))
+            entry.update(id=doc_id, category=result["category"])
+            self.pending.append({
+                "doc_id": doc_id,
+                "username": self.username,
+                "filename": result["filename"],
+                "category": result["category"],
+                "confidence": result["confidence"],
+                "timestamp": datetime.now().isoformat(),
+                "text": result["text"],
+                "metadata": result["metadata"],
+                "content_path": result["path"],
+                "signature": result["signature"],
+            })
+        else:
+            entry["error"] = result.get("error")
+            if status == "failed":
+                logger.warning(f"Failed: {result['path']} ({result.get('error')})")
+
+        self.pending_entries.append(entry)
+        if len(self.pending_entries) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Commit queued documents, then record them in the manifest"""
+        if not self.pending_entries:
+            return
+        # Database first: a crash between the two steps replays the batch on the
+        # next run, and skip_existing drops the documents that already made it.
+        try:
+            db.add_documents_batch(self.pending, skip_existing=True)
+        except Exception as e:
+            # Leave the batch to the next run instead of aborting this one
+            logger.error(f"Batch of {len(self.pending)} documents failed: {e}")
+            for entry in self.pending_entries:
+                if entry["status"] == "imported":
+                    entry.update(status="failed", error=f"Database error: {e}")
+                    entry.pop("id", None)
+                    entry.pop("category", None)
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            for entry in self.pending_entries:
+                f.write(json.dumps(entry) + "\n")
+                key = entry["status"]
+                self.stats[key] += 1
+        self.pending = []
+        self.pending_entries = []
+
+
+def run_import(root: str, username: str, manifest_path: str, workers: int, batch_size: int) -> dict:
+    """Import every pending document under root. Returns summary stats."""
+    db.init_db()
+    if not db.user_exists(username):
+        raise ValueError(f"User '{username}' does not exist")
+
+    manifest = load_manifest(manifest_path)
+    all_paths = find_documents(root)
+    todo = [p for p in all_paths if manifest.get(p, {}).get("status") not in DONE_STATUSES]
+    logger.info(f"Found {len(all_paths)} documents, {len(all_paths) - len(todo)} already done, {len(todo)} to import")
+
+    importer = BulkImporter(username, manifest_path, batch_size)
+    start = time.perf_counter()
+    processed = 0
+
+    with multiprocessing.Pool(processes=workers, initializer=_init_worker) as pool:
+        for result in pool.imap_unordered(process_file, todo, chunksize=8):
+            importer.add(result)
+            processed += 1
+            if processed % batch_size == 0:
+                elapsed = time.perf_counter() - start
+                logger.info(f"Progress: {processed}/{len(todo)} files ({processed / elapsed:.1f} files/sec)")
+    importer.flush()
+
+    elapsed = time.perf_counter() - start
+    summary = dict(importer.stats)
+    summary["processed"] = processed
+    summary["elapsed_seconds"] = round(elapsed, 2)
+    summary["files_per_second"] = round(processed / elapsed, 1) if elapsed > 0 else 0.0
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import a directory of PDF/DOCX documents")
+    parser.add_argument("directory", help="Directory to scan recursively")
+    parser.add_argument("--user", required=True, help="Username that will own the imported documents")
+    parser.add_argument("--manifest", help="Resumable manifest path (default: <directory>/.bulk_import_manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per database transaction")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory")
+
+    manifest_path = args.manifest or os.path.join(args.directory, ".bulk_import_manifest.jsonl")
+
+    try:
+        summary = run_import(args.directory, args.user, manifest_path, max(1, args.workers), max(1, args.batch_size))
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    logger.info(
+        f"Done: {summary['imported']} imported, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed in {summary['elapsed_seconds']}s "
+        f"({summary['files_per_second']} files/sec). Manifest: {manifest_path}"
+    )
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
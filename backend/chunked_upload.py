@@ -0,0 +1,119 @@
+"""Resumable Chunked Uploads - on-disk side of the upload session protocol
+
+A client starts a session (POST /uploads), sends fixed-size numbered chunks
+(PUT /uploads/{id}/chunks/{n}, each with its SHA-256) in any order and as
+often as needed, then finalizes (POST /uploads/{id}/complete), which hands
+the assembled file to the normal extraction and classification path.
+
+Each session's bytes live in one preallocated part file under UPLOAD_DIR
+(beside app.db unless set); chunks are written at their offset, so a retried
+chunk simply overwrites itself. Which chunks have arrived is tracked in the upload_sessions and
+upload_chunks tables (see database.py), so any worker can take any chunk.
+Sessions idle for UPLOAD_SESSION_TTL_HOURS are removed by db_maintenance.py.
+"""
+import hashlib
+import os
+import re
+
+import storage_paths
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(storage_paths.DATA_DIR, "uploads"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE_MB", "5")) * 1024 * 1024
+MAX_CHUNKED_FILE_SIZE_MB = int(os.getenv("MAX_CHUNKED_FILE_SIZE_MB", "100"))
+MAX_CHUNKED_FILE_SIZE_BYTES = MAX_CHUNKED_FILE_SIZE_MB * 1024 * 1024
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_upload_id(value: str) -> bool:
+    return bool(_UPLOAD_ID_RE.match(value))
+
+
+def is_sha256(value: str | None) -> bool:
+    return bool(value) and bool(_SHA256_RE.match(value))
+
+
+def part_path(upload_id: str) -> str:
+    """Path of a session's part file"""
+    if not is_upload_id(upload_id):
+        raise ValueError("Invalid upload id")
+    return os.path.join(UPLOAD_DIR, f"{upload_id}.part")
+
+
+def chunk_count(size: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    return max(1, -(-size // chunk_size))
+
+
+def chunk_length(index: int, size: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """Expected byte length of chunk index (the last one may be short)"""
+    return min(chunk_size, size - index * chunk_size)
+
+
+def create_part_file(upload_id: str, size: int) -> str:
+    """Create the part file at its final size so chunks can land in any order"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = part_path(upload_id)
+    with open(path, "wb") as f:
+        f.truncate(size)
+    return path
+
+
+def write_chunk(upload_id: str, offset: int, data: bytes, sha256: str) -> bool:
+    """Write chunk bytes at offset if they match sha256. Returns False on a hash mismatch.
+
+    Raises FileNotFoundError if the session's part file is gone.
+    """
+    if hashlib.sha256(data).hexdigest() != sha256:
+        return False
+    with open(part_path(upload_id), "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    return True
+
+
+def hash_part(upload_id: str) -> str:
+    """SHA-256 hex digest of a part file, read in blocks (never held in memory whole)"""
+    digest = hashlib.sha256()
+    with open(part_path(upload_id), "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_part(upload_id: str) -> bytes:
+    """Read an assembled part file.
+
+    The extractors (PyPDF2, the DOCX zip reader) and the blob store work on
+    the complete document, so this is the one place the file is buffered.
+    """
+    with open(part_path(upload_id), "rb") as f:
+        return f.read()
+
+
+def remove_part(upload_id: str):
+    try:
+        os.remove(part_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def list_part_files() -> list:
+    """(upload_id, mtime) of every part file on disk"""
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except FileNotFoundError:
+        return []
+    parts = []
+    for name in names:
+        upload_id, ext = os.path.splitext(name)
+        if ext != ".part" or not is_upload_id(upload_id):
+            continue
+        try:
+            parts.append((upload_id, os.path.getmtime(os.path.join(UPLOAD_DIR, name))))
+        except FileNotFoundError:
+            continue
+    return parts
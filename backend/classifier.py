@@ -1,6 +1,7 @@
 """Document Classifier using Keyword-Based Classification (Lightweight)"""
 import re
 import os
+from typing import Optional
 
 
 class DocumentClassifier:
@@ -112,4 +113,16 @@ class DocumentClassifier:
             dominance_bonus = 0
         
         confidence = base_confidence + match_bonus + dominance_bonus
-        return round(min(0.95, confidence), 3)
\ No newline at end of file
+        return round(min(0.95, confidence), 3)
+
+
+# Singleton instance
+_classifier: Optional[DocumentClassifier] = None
+
+
+def get_classifier() -> DocumentClassifier:
+    """Get or create the classifier singleton"""
+    global _classifier
+    if _classifier is None:
+        _classifier = DocumentClassifier()
+    return _classifier
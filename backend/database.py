@@ -1,17 +1,56 @@
 """SQLite Database Module for Smart Document Organizer"""
 import sqlite3
+import json
 import os
 from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
-# Database file path
-DB_PATH = os.path.join(os.path.dirname(__file__), "app.db")
+import blob_store
+import similarity
+import storage_paths
+
+# Database file path. WAL mode keeps app.db-wal and app.db-shm beside it, so
+# deployments should persist the whole directory, not just this file.
+DB_PATH = storage_paths.DB_PATH
+
+# Precomputed per-document metadata, so listings never need document_texts
+DOCUMENT_METADATA_COLUMNS = {
+    "text_preview": "TEXT",
+    "char_count": "INTEGER",
+    "word_count": "INTEGER",
+    "page_count": "INTEGER",
+    "content_hash": "TEXT",
+}
+_METADATA_SELECT = ", ".join(DOCUMENT_METADATA_COLUMNS)
+_DOCUMENT_INSERT = (
+    "INSERT INTO documents (id, username, filename, category, confidence, timestamp, "
+    f"changed_version, changed_at, {_METADATA_SELECT}) "
+    f"VALUES ({', '.join('?' * (8 + len(DOCUMENT_METADATA_COLUMNS)))})"
+)
+
+
+def _local_to_utc_iso(timestamp: str | None, fallback: str) -> str:
+    """Convert a naive local ISO timestamp to UTC ISO, or fallback if it cannot be parsed"""
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return fallback
+    return parsed.astimezone(timezone.utc).isoformat()
 
 
 def init_db():
     """Initialize database and create tables if they don't exist"""
+    os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
     with get_db() as conn:
         cursor = conn.cursor()
         
+        # Free pages are returned by db_maintenance.py in small steps. Only takes
+        # effect on a new database; existing ones need one full VACUUM.
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        
+        # WAL lets reads proceed while the writer commits (persists in the file)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Users table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -35,6 +74,32 @@ def init_db():
             )
         """)
         
+        # Metadata columns computed once at ingest (added to older databases in place)
+        existing = {row["name"] for row in cursor.execute("PRAGMA table_info(documents)")}
+        for column, column_type in DOCUMENT_METADATA_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE documents ADD COLUMN {column} {column_type}")
+        # Set only when the original file was kept in the blob store
+        if "blob_hash" not in existing:
+            cursor.execute("ALTER TABLE documents ADD COLUMN blob_hash TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_blob_hash ON documents (blob_hash)")
+        # Library version and UTC time of the last add or move, for incremental export
+        if "changed_version" not in existing:
+            cursor.execute("ALTER TABLE documents ADD COLUMN changed_version INTEGER")
+            cursor.execute("ALTER TABLE documents ADD COLUMN changed_at TEXT")
+            # timestamp is naive server-local time; changed_at is compared as UTC ISO
+            migrated_at = datetime.now(timezone.utc).isoformat()
+            cursor.executemany(
+                "UPDATE documents SET changed_version = 0, changed_at = ? WHERE id = ?",
+                [(_local_to_utc_iso(row[1], migrated_at), row[0])
+                 for row in cursor.execute("SELECT id, timestamp FROM documents").fetchall()]
+            )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_changes ON documents (username, changed_version)")
+        # Per-category listings (and the dashboard's window) in timestamp order without a sort
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_user_category ON documents (username, category, timestamp DESC)"
+        )
+        
         # Document texts for summarization
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS document_texts (
@@ -44,6 +109,114 @@ def init_db():
             )
         """)
         
+        # Original uploaded files, stored once per content hash in blob_store
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                ref_count INTEGER NOT NULL
+            )
+        """)
+        
+        # MinHash signatures and their LSH band buckets for near-duplicate lookup
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_signatures (
+                document_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                FOREIGN KEY (document_id) REFERENCES documents(id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                username TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                document_id TEXT NOT NULL,
+                FOREIGN KEY (document_id) REFERENCES documents(id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_lsh_lookup ON lsh_buckets (username, band, bucket)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_lsh_document ON lsh_buckets (document_id)")
+        
+        # Per-user library version, bumped on every change to the user's documents.
+        # Lets listing endpoints answer conditional GETs without touching documents.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS library_versions (
+                username TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at TEXT NOT NULL,
+                pruned_version INTEGER NOT NULL DEFAULT 0,
+                pruned_before TEXT,
+                FOREIGN KEY (username) REFERENCES users(username)
+            )
+        """)
+        # Newest tombstone version / cutoff time dropped by maintenance; older cursors need a full export
+        existing = {row["name"] for row in cursor.execute("PRAGMA table_info(library_versions)")}
+        if "pruned_version" not in existing:
+            cursor.execute("ALTER TABLE library_versions ADD COLUMN pruned_version INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE library_versions ADD COLUMN pruned_before TEXT")
+        
+        # Paths removed from a user's export (deleted or moved documents), for incremental export
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_tombstones (
+                document_id TEXT NOT NULL,
+                username TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                category TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_user ON document_tombstones (username, version)")
+        
+        # Resumable chunked uploads in progress (bytes live in chunked_upload.UPLOAD_DIR)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS upload_sessions (
+                id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                sha256 TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                completing INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (username) REFERENCES users(username)
+            )
+        """)
+        # Set while one request assembles and classifies the upload
+        existing = {row["name"] for row in cursor.execute("PRAGMA table_info(upload_sessions)")}
+        if "completing" not in existing:
+            cursor.execute("ALTER TABLE upload_sessions ADD COLUMN completing INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS upload_chunks (
+                upload_id TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                written INTEGER NOT NULL DEFAULT 1,
+                writers INTEGER NOT NULL DEFAULT 0,
+                write_started TEXT,
+                PRIMARY KEY (upload_id, chunk_index),
+                FOREIGN KEY (upload_id) REFERENCES upload_sessions(id)
+            )
+        """)
+        # written: the bytes are on disk; writers: requests writing the chunk right now
+        existing = {row["name"] for row in cursor.execute("PRAGMA table_info(upload_chunks)")}
+        if "writers" not in existing:
+            cursor.execute("ALTER TABLE upload_chunks ADD COLUMN written INTEGER NOT NULL DEFAULT 1")
+            cursor.execute("ALTER TABLE upload_chunks ADD COLUMN writers INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE upload_chunks ADD COLUMN write_started TEXT")
+        
+        # Last run of each periodic job, shared by all workers (see db_maintenance.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                name TEXT PRIMARY KEY,
+                last_run TEXT NOT NULL,
+                report TEXT
+            )
+        """)
+        
         conn.commit()
         print("[OK] Database initialized")
 
@@ -96,19 +269,193 @@ def email_exists(email: str) -> bool:
         return row is not None
 
 
+# Library version operations
+def _bump_library_version(conn, username: str) -> tuple:
+    """Increment a user's library version inside the caller's transaction.
+
+    Returns the new (version, updated_at), which changed rows are stamped with.
+    """
+    row = conn.execute(
+        """INSERT INTO library_versions (username, version, updated_at) VALUES (?, 1, ?)
+           ON CONFLICT(username) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+           RETURNING version, updated_at""",
+        (username, datetime.now(timezone.utc).isoformat())
+    ).fetchone()
+    return row["version"], row["updated_at"]
+
+
+def _record_tombstones(conn, where: str, params: tuple, reason: str, change: tuple) -> int:
+    """Remember the export paths of documents matching where before they are deleted or moved"""
+    return conn.execute(
+        f"""INSERT INTO document_tombstones (document_id, username, filename, category, reason, version, deleted_at)
+            SELECT id, username, filename, category, ?, ?, ? FROM documents WHERE {where}""",
+        (reason, *change, *params)
+    ).rowcount
+
+
+def get_library_version(username: str) -> tuple:
+    """Get (version, updated_at) for a user's library. (0, None) if never changed."""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT version, updated_at FROM library_versions WHERE username = ?",
+            (username,)
+        ).fetchone()
+        return (row["version"], row["updated_at"]) if row else (0, None)
+
+
+# Blob reference counting
+def _has_blob_source(d: dict) -> bool:
+    return bool(d.get("metadata", {}).get("content_hash")) and (
+        d.get("content") is not None or d.get("content_path") is not None
+    )
+
+
+def _write_blobs(documents: list):
+    """Store the blob files of new documents before their write transaction opens.
+
+    File I/O then never holds SQLite's write lock. A file left behind by a
+    transaction that fails afterwards is removed by db_maintenance.py.
+    """
+    for d in documents:
+        if _has_blob_source(d) and d.get("content") is not None:
+            blob_store.put_blob(d["metadata"]["content_hash"], d["content"])
+
+
+def _retain_blob(conn, doc_id: str, content_hash: str, content: bytes | None = None, content_path: str | None = None):
+    """Point a document at its already-written blob and take a reference (caller's transaction).
+
+    A delete that committed after the file was written may have collected it.
+    That is checked here, under the write lock, and only then is the file
+    restored from content or content_path.
+    """
+    path = blob_store.blob_path(content_hash)
+    if not os.path.exists(path):
+        if content is None:
+            with open(content_path, "rb") as f:
+                content = f.read()
+        blob_store.put_blob(content_hash, content)
+    conn.execute("UPDATE documents SET blob_hash = ? WHERE id = ?", (content_hash, doc_id))
+    conn.execute(
+        """INSERT INTO blobs (hash, size, ref_count) VALUES (?, ?, 1)
+           ON CONFLICT(hash) DO UPDATE SET ref_count = ref_count + 1""",
+        (content_hash, os.path.getsize(path))
+    )
+
+
+def _release_blobs(conn, where: str, params: tuple):
+    """Drop one blob reference per document matching where, before those rows are deleted"""
+    conn.execute(
+        f"""UPDATE blobs SET ref_count = ref_count - (
+                SELECT COUNT(*) FROM documents WHERE blob_hash = blobs.hash AND {where}
+            )
+            WHERE hash IN (SELECT blob_hash FROM documents WHERE {where})""",
+        params + params
+    )
+
+
+def _collect_garbage_blobs(conn) -> int:
+    """Remove unreferenced blob rows and files. Returns bytes freed.
+
+    Runs inside the deleting transaction, while SQLite's write lock is held,
+    so a concurrent upload of the same content cannot re-reference the blob
+    between the row delete and the file removal.
+    """
+    freed = 0
+    for row in conn.execute("DELETE FROM blobs WHERE ref_count <= 0 RETURNING hash").fetchall():
+        freed += blob_store.remove_blob(row["hash"])
+    return freed
+
+
+# Near-duplicate index
+def _index_signature(conn, doc_id: str, username: str, signature: list):
+    """Store a document's MinHash signature and LSH buckets (caller's transaction)"""
+    conn.execute(
+        "INSERT INTO document_signatures (document_id, signature) VALUES (?, ?)",
+        (doc_id, similarity.signature_to_bytes(signature))
+    )
+    conn.executemany(
+        "INSERT INTO lsh_buckets (username, band, bucket, document_id) VALUES (?, ?, ?, ?)",
+        [(username, band, bucket, doc_id) for band, bucket in similarity.band_buckets(signature)]
+    )
+
+
+def _remove_signatures(conn, where: str, params: tuple):
+    """Drop index entries for documents matching where, before those rows are deleted"""
+    conn.execute(f"DELETE FROM lsh_buckets WHERE document_id IN (SELECT id FROM documents WHERE {where})", params)
+    conn.execute(f"DELETE FROM document_signatures WHERE document_id IN (SELECT id FROM documents WHERE {where})", params)
+
+
+def get_document_signature(doc_id: str) -> list | None:
+    """Get the stored MinHash signature for a document"""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT signature FROM document_signatures WHERE document_id = ?",
+            (doc_id,)
+        ).fetchone()
+        return similarity.signature_from_bytes(row["signature"]) if row else None
+
+
+def find_similar_documents(username: str, signature: list, exclude_id: str | None = None,
+                           threshold: float = similarity.SIMILARITY_THRESHOLD) -> list:
+    """Find the user's documents whose estimated similarity to signature is >= threshold.
+
+    Only documents sharing at least one LSH bucket are compared, so the cost
+    depends on the number of candidates rather than the size of the library.
+    """
+    buckets = similarity.band_buckets(signature)
+    with get_db() as conn:
+        rows = conn.execute(
+            f"""SELECT d.id, d.filename, d.category, d.timestamp, s.signature
+                FROM documents d
+                JOIN document_signatures s ON s.document_id = d.id
+                WHERE d.id IN (
+                    SELECT document_id FROM lsh_buckets
+                    WHERE username = ? AND ({" OR ".join(["(band = ? AND bucket = ?)"] * len(buckets))})
+                )""",
+            (username, *[value for pair in buckets for value in pair])
+        ).fetchall()
+    
+    matches = []
+    for row in rows:
+        if row["id"] == exclude_id:
+            continue
+        score = similarity.estimate_similarity(signature, similarity.signature_from_bytes(row["signature"]))
+        if score >= threshold:
+            match = {key: row[key] for key in ("id", "filename", "category", "timestamp")}
+            match["similarity"] = round(score, 3)
+            matches.append(match)
+    matches.sort(key=lambda m: m["similarity"], reverse=True)
+    return matches
+
+
 # Document operations
 def add_document(doc_id: str, username: str, filename: str, category: str, 
-                 confidence: float, timestamp: str, text: str):
-    """Add a new document and its text"""
+                 confidence: float, timestamp: str, text: str, metadata: dict | None = None,
+                 content: bytes | None = None, signature: list | None = None):
+    """Add a new document and its text. metadata holds the DOCUMENT_METADATA_COLUMNS values.
+
+    When content (the original file bytes) is given it is kept in the blob store
+    under metadata["content_hash"]. A MinHash signature, if given, is added to
+    the near-duplicate index.
+    """
+    metadata = metadata or {}
+    if content is not None and metadata.get("content_hash"):
+        blob_store.put_blob(metadata["content_hash"], content)
     with get_db() as conn:
+        change = _bump_library_version(conn, username)
         conn.execute(
-            "INSERT INTO documents (id, username, filename, category, confidence, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-            (doc_id, username, filename, category, confidence, timestamp)
+            _DOCUMENT_INSERT,
+            (doc_id, username, filename, category, confidence, timestamp, *change,
+             *(metadata.get(column) for column in DOCUMENT_METADATA_COLUMNS))
         )
         conn.execute(
             "INSERT INTO document_texts (document_id, content) VALUES (?, ?)",
             (doc_id, text)
         )
+        if content is not None and metadata.get("content_hash"):
+            _retain_blob(conn, doc_id, metadata["content_hash"], content)
+        if signature:
+            _index_signature(conn, doc_id, username, signature)
         conn.commit()
 
 
@@ -126,12 +473,51 @@ def get_user_documents(username: str, category: str) -> list:
     """Get documents for a user by category"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT id, filename, category, confidence, timestamp FROM documents WHERE username = ? AND category = ? ORDER BY timestamp DESC",
+            f"SELECT id, filename, category, confidence, timestamp, {_METADATA_SELECT} FROM documents WHERE username = ? AND category = ? ORDER BY timestamp DESC",
             (username, category)
         ).fetchall()
         return [dict(row) for row in rows]
 
 
+def get_dashboard(username: str, page_size: int) -> dict:
+    """Category counts plus the newest page_size documents of every category.
+
+    One connection and one windowed query; the library version is read in the
+    same snapshot so it can serve as the response's ETag.
+    """
+    with get_db() as conn:
+        conn.execute("BEGIN")
+        try:
+            version = conn.execute(
+                "SELECT version, updated_at FROM library_versions WHERE username = ?",
+                (username,)
+            ).fetchone()
+            rows = conn.execute(
+                f"""SELECT id, filename, category, confidence, timestamp, {_METADATA_SELECT}, total FROM (
+                        SELECT id, filename, category, confidence, timestamp, {_METADATA_SELECT},
+                               ROW_NUMBER() OVER (PARTITION BY category ORDER BY timestamp DESC) AS position,
+                               COUNT(*) OVER (PARTITION BY category) AS total
+                        FROM documents WHERE username = ?
+                    )
+                    WHERE position <= ?
+                    ORDER BY category, position""",
+                (username, page_size)
+            ).fetchall()
+        finally:
+            conn.rollback()
+    
+    counts, documents = {}, {}
+    for row in rows:
+        document = dict(row)
+        counts[document["category"]] = document.pop("total")
+        documents.setdefault(document["category"], []).append(document)
+    return {
+        "version": (version["version"], version["updated_at"]) if version else (0, None),
+        "counts": counts,
+        "documents": documents,
+    }
+
+
 def get_document_text(doc_id: str) -> str | None:
     """Get document text by ID"""
     with get_db() as conn:
@@ -146,7 +532,7 @@ def get_document(doc_id: str) -> dict | None:
     """Get document by ID"""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT id, username, filename, category, confidence, timestamp FROM documents WHERE id = ?",
+            f"SELECT id, username, filename, category, confidence, timestamp, {_METADATA_SELECT} FROM documents WHERE id = ?",
             (doc_id,)
         ).fetchone()
         return dict(row) if row else None
@@ -164,14 +550,31 @@ def delete_document(doc_id: str, username: str) -> bool:
         if not row:
             return False
         
+        _record_tombstones(conn, "id = ?", (doc_id,), "deleted", _bump_library_version(conn, username))
+        _release_blobs(conn, "id = ?", (doc_id,))
+        _remove_signatures(conn, "id = ?", (doc_id,))
+        
         # Delete document text first (foreign key)
         conn.execute("DELETE FROM document_texts WHERE document_id = ?", (doc_id,))
         # Delete document
         conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        _collect_garbage_blobs(conn)
         conn.commit()
         return True
 
 
+def get_document_blob(doc_id: str) -> dict | None:
+    """Get the stored original file info (hash, size) for a document, if any"""
+    with get_db() as conn:
+        row = conn.execute(
+            """SELECT b.hash, b.size FROM documents d
+               JOIN blobs b ON b.hash = d.blob_hash
+               WHERE d.id = ?""",
+            (doc_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
 def get_all_user_documents(username: str) -> list:
     """Get all documents for a user (for ZIP download)"""
     with get_db() as conn:
@@ -185,3 +588,306 @@ def get_all_user_documents(username: str) -> list:
         ).fetchall()
         return [dict(row) for row in rows]
 
+
+
+def add_documents_batch(documents: list, skip_existing: bool = False) -> int:
+    """Add many documents and their texts in a single transaction.
+
+    Each item is a dict with the same keys as add_document's arguments
+    (content and signature optional). Instead of content, an item may carry
+    content_path: the original file, whose blob the caller has already stored
+    with blob_store.put_blob. With skip_existing, items whose doc_id is
+    already stored are left out, so a batch with deterministic IDs can be
+    replayed safely.
+    Returns the number of documents inserted.
+    """
+    if not documents:
+        return 0
+    _write_blobs(documents)
+    with get_db() as conn:
+        if skip_existing:
+            stored = {
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM documents WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([d["doc_id"] for d in documents]),)
+                )
+            }
+            documents = [d for d in documents if d["doc_id"] not in stored]
+            if not documents:
+                return 0
+        changes = {username: _bump_library_version(conn, username) for username in {d["username"] for d in documents}}
+        conn.executemany(
+            _DOCUMENT_INSERT,
+            [(d["doc_id"], d["username"], d["filename"], d["category"], d["confidence"], d["timestamp"],
+              *changes[d["username"]],
+              *(d.get("metadata", {}).get(column) for column in DOCUMENT_METADATA_COLUMNS))
+             for d in documents]
+        )
+        conn.executemany(
+            "INSERT INTO document_texts (document_id, content) VALUES (?, ?)",
+            [(d["doc_id"], d["text"]) for d in documents]
+        )
+        for d in documents:
+            if _has_blob_source(d):
+                _retain_blob(conn, d["doc_id"], d["metadata"]["content_hash"], d.get("content"), d.get("content_path"))
+            if d.get("signature"):
+                _index_signature(conn, d["doc_id"], d["username"], d["signature"])
+        conn.commit()
+        return len(documents)
+
+
+def _bulk_filter(username: str, doc_ids: list | None, category: str | None) -> tuple:
+    """Build the owned-documents WHERE clause for bulk operations.
+
+    IDs are passed as a single JSON array and expanded with json_each, so the
+    statement stays set-based regardless of how many IDs are sent.
+    """
+    if doc_ids is not None:
+        return "username = ? AND id IN (SELECT value FROM json_each(?))", (username, json.dumps(doc_ids))
+    return "username = ? AND category = ?", (username, category)
+
+
+def bulk_delete_documents(username: str, doc_ids: list | None = None, category: str | None = None) -> int:
+    """Delete the user's documents by ID list or category in one transaction.
+
+    Documents not owned by the user are ignored. Returns the number deleted.
+    """
+    where, params = _bulk_filter(username, doc_ids, category)
+    with get_db() as conn:
+        if not _record_tombstones(conn, where, params, "deleted", _bump_library_version(conn, username)):
+            conn.rollback()
+            return 0
+        _release_blobs(conn, where, params)
+        _remove_signatures(conn, where, params)
+        conn.execute(
+            f"DELETE FROM document_texts WHERE document_id IN (SELECT id FROM documents WHERE {where})",
+            params
+        )
+        deleted = conn.execute(f"DELETE FROM documents WHERE {where}", params).rowcount
+        _collect_garbage_blobs(conn)
+        conn.commit()
+        return deleted
+
+
+def bulk_recategorize_documents(username: str, new_category: str, doc_ids: list | None = None,
+                                category: str | None = None) -> int:
+    """Move the user's documents (by ID list or current category) to new_category.
+
+    Documents not owned by the user are ignored. Returns the number updated.
+    """
+    where, params = _bulk_filter(username, doc_ids, category)
+    with get_db() as conn:
+        change = _bump_library_version(conn, username)
+        # Moved documents leave their old export path behind
+        _record_tombstones(conn, f"{where} AND category != ?", (*params, new_category), "moved", change)
+        updated = conn.execute(
+            f"UPDATE documents SET category = ?, changed_version = ?, changed_at = ? WHERE {where}",
+            (new_category, *change, *params)
+        ).rowcount
+        if not updated:
+            conn.rollback()
+            return 0
+        conn.commit()
+        return updated
+
+
+def get_library_changes(username: str, since_version: int | None = None, since_time: str | None = None) -> dict:
+    """Documents and removed export paths since a library version or UTC ISO time.
+
+    With neither, or when the requested point predates pruned tombstones (or
+    is ahead of the library), everything is returned with full=True. Reads
+    happen in one snapshot, so the returned version covers exactly these changes.
+    """
+    with get_db() as conn:
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT version, pruned_version, pruned_before FROM library_versions WHERE username = ?",
+                (username,)
+            ).fetchone()
+            version = row["version"] if row else 0
+            full = (
+                (since_version is None and since_time is None)
+                or (since_version is not None and (since_version > version
+                                                   or (row is not None and since_version < row["pruned_version"])))
+                or (since_time is not None and row is not None and row["pruned_before"] is not None
+                    and since_time < row["pruned_before"])
+            )
+            
+            query = """SELECT d.id, d.filename, d.category, d.confidence, d.timestamp, d.changed_at, dt.content
+                       FROM documents d
+                       LEFT JOIN document_texts dt ON d.id = dt.document_id
+                       WHERE d.username = ?"""
+            if full:
+                documents = conn.execute(query + " ORDER BY d.category, d.timestamp DESC", (username,)).fetchall()
+                deleted = []
+            else:
+                column, tomb_column, since = (
+                    ("d.changed_version", "version", since_version) if since_version is not None
+                    else ("d.changed_at", "deleted_at", since_time)
+                )
+                documents = conn.execute(
+                    query + f" AND {column} > ? ORDER BY d.category, d.timestamp DESC", (username, since)
+                ).fetchall()
+                deleted = conn.execute(
+                    f"""SELECT document_id, filename, category, reason, deleted_at FROM document_tombstones
+                        WHERE username = ? AND {tomb_column} > ? ORDER BY version""",
+                    (username, since)
+                ).fetchall()
+        finally:
+            conn.rollback()
+        
+        return {
+            "version": version,
+            "full": full,
+            "documents": [dict(r) for r in documents],
+            "deleted": [dict(r) for r in deleted],
+        }
+
+
+# Resumable upload sessions
+# A registered chunk write older than this is treated as abandoned (its request died)
+CHUNK_WRITE_TIMEOUT_SECONDS = 600
+
+
+def create_upload_session(upload_id: str, username: str, filename: str, size: int, chunk_size: int,
+                          sha256: str | None = None):
+    now = datetime.now(timezone.utc).isoformat()
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO upload_sessions (id, username, filename, size, chunk_size, sha256, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (upload_id, username, filename, size, chunk_size, sha256, now, now)
+        )
+        conn.commit()
+
+
+def get_upload_session(upload_id: str, username: str) -> dict | None:
+    """Get the user's upload session with the sorted indexes of chunks received so far"""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM upload_sessions WHERE id = ? AND username = ?",
+            (upload_id, username)
+        ).fetchone()
+        if not row:
+            return None
+        session = dict(row)
+        session["received"] = [
+            r["chunk_index"] for r in conn.execute(
+                "SELECT chunk_index FROM upload_chunks WHERE upload_id = ? AND written = 1 ORDER BY chunk_index",
+                (upload_id,)
+            )
+        ]
+        return session
+
+
+def begin_upload_chunk(upload_id: str, chunk_index: int) -> bool:
+    """Register a chunk write before any bytes reach the part file, and touch the session.
+
+    Returns False if the session no longer exists or is being completed.
+    While the write is registered claim_upload_session refuses the session,
+    so a completing request never reads a part file that is still changing.
+    Always follow with end_upload_chunk.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    with get_db() as conn:
+        touched = conn.execute(
+            "UPDATE upload_sessions SET updated_at = ? WHERE id = ? AND completing = 0",
+            (now, upload_id)
+        ).rowcount
+        if not touched:
+            return False
+        conn.execute(
+            """INSERT INTO upload_chunks (upload_id, chunk_index, sha256, written, writers, write_started)
+               VALUES (?, ?, '', 0, 1, ?)
+               ON CONFLICT(upload_id, chunk_index) DO UPDATE SET
+                   writers = writers + 1, write_started = excluded.write_started""",
+            (upload_id, chunk_index, now)
+        )
+        conn.commit()
+        return True
+
+
+def end_upload_chunk(upload_id: str, chunk_index: int, sha256: str | None) -> int:
+    """Finish a write registered by begin_upload_chunk; sha256 is None if it failed.
+
+    Returns the number of chunks received.
+    """
+    with get_db() as conn:
+        conn.execute(
+            """UPDATE upload_chunks SET
+                   writers = MAX(writers - 1, 0),
+                   written = CASE WHEN ? IS NULL THEN written ELSE 1 END,
+                   sha256 = COALESCE(?, sha256)
+               WHERE upload_id = ? AND chunk_index = ?""",
+            (sha256, sha256, upload_id, chunk_index)
+        )
+        received = conn.execute(
+            "SELECT COUNT(*) FROM upload_chunks WHERE upload_id = ? AND written = 1", (upload_id,)
+        ).fetchone()[0]
+        conn.commit()
+        return received
+
+
+def claim_upload_session(upload_id: str, username: str) -> dict | None:
+    """Mark the user's session as completing and return it, so only one finalize can proceed.
+
+    Returns None if it doesn't exist, is already claimed, or has a chunk
+    write in progress (one registered less than CHUNK_WRITE_TIMEOUT_SECONDS
+    ago; older ones belong to a crashed request). Claiming touches updated_at,
+    so maintenance does not expire the session while it is being processed.
+    Follow with finish_upload_session on success or release_upload_session on failure.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = (now - timedelta(seconds=CHUNK_WRITE_TIMEOUT_SECONDS)).isoformat()
+    with get_db() as conn:
+        row = conn.execute(
+            """UPDATE upload_sessions SET completing = 1, updated_at = ?
+               WHERE id = ? AND username = ? AND completing = 0
+                 AND NOT EXISTS (SELECT 1 FROM upload_chunks
+                                 WHERE upload_id = upload_sessions.id AND writers > 0 AND write_started >= ?)
+               RETURNING *""",
+            (now.isoformat(), upload_id, username, stale_before)
+        ).fetchone()
+        conn.commit()
+        return dict(row) if row else None
+
+
+def release_upload_session(upload_id: str):
+    """Give a claimed session back (e.g. processing failed) so the client can retry"""
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE upload_sessions SET completing = 0, updated_at = ? WHERE id = ?",
+            (datetime.now(timezone.utc).isoformat(), upload_id)
+        )
+        conn.commit()
+
+
+def finish_upload_session(upload_id: str):
+    """Delete a session and its chunk records once it is no longer needed"""
+    with get_db() as conn:
+        conn.execute("DELETE FROM upload_chunks WHERE upload_id = ?", (upload_id,))
+        conn.execute("DELETE FROM upload_sessions WHERE id = ?", (upload_id,))
+        conn.commit()
+
+
+def delete_expired_upload_sessions(cutoff: str) -> list:
+    """Delete sessions idle since before cutoff (ISO timestamp). Returns their IDs."""
+    with get_db() as conn:
+        expired = [
+            row["id"] for row in conn.execute(
+                "DELETE FROM upload_sessions WHERE updated_at < ? RETURNING id", (cutoff,)
+            ).fetchall()
+        ]
+        conn.execute(
+            "DELETE FROM upload_chunks WHERE upload_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(expired),)
+        )
+        conn.commit()
+        return expired
+
+
+def get_upload_session_ids() -> set:
+    """IDs of all upload sessions in progress"""
+    with get_db() as conn:
+        return {row["id"] for row in conn.execute("SELECT id FROM upload_sessions")}
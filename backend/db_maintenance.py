@@ -0,0 +1,441 @@
+"""Database Maintenance - periodic housekeeping for app.db and the blob store
+
+Usage:
+    python db_maintenance.py [--force] [--full-vacuum]
+
+Each run:
+  1. expires idle chunked upload sessions and prunes old export tombstones
+  2. deletes orphan rows (texts, signatures and LSH buckets whose document
+     is gone)
+  3. repairs blob reference counts and removes unreferenced blobs, including
+     files left on disk by interrupted uploads
+  4. returns free pages to the filesystem with incremental vacuum
+  5. refreshes query planner statistics (ANALYZE with a bounded sample)
+  6. checkpoints and truncates the WAL
+
+Work is split into short transactions with a pause after each, so foreground
+queries wait for at most one small step. Files are only renamed aside while
+the write lock is held; they are unlinked after it is released. In the API, MaintenanceTask runs a
+pass in a worker thread once per interval; the last run time lives in the
+maintenance_runs table, so with several workers only one of them runs it.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import blob_store
+import chunked_upload
+import database as db
+
+logger = logging.getLogger(__name__)
+
+DB_MAINTENANCE_ENABLED = os.getenv("DB_MAINTENANCE_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_MAINTENANCE_INTERVAL_MINUTES = float(os.getenv("DB_MAINTENANCE_INTERVAL_MINUTES", "360"))
+DB_MAINTENANCE_STEP_PAGES = int(os.getenv("DB_MAINTENANCE_STEP_PAGES", "256"))
+DB_MAINTENANCE_BATCH_ROWS = int(os.getenv("DB_MAINTENANCE_BATCH_ROWS", "500"))
+DB_MAINTENANCE_PAUSE_MS = float(os.getenv("DB_MAINTENANCE_PAUSE_MS", "50"))
+EXPORT_TOMBSTONE_RETENTION_DAYS = float(os.getenv("EXPORT_TOMBSTONE_RETENTION_DAYS", "90"))
+
+JOB_NAME = "db_maintenance"
+# How often each worker checks whether a run is due
+POLL_SECONDS = 600
+# Rows sampled per index by ANALYZE, keeping it fast on large tables
+ANALYSIS_LIMIT = 1000
+# Blob files without a blobs row younger than this may belong to an upload in progress
+STRAY_FILE_MIN_AGE_SECONDS = 3600
+# Files renamed aside per write transaction; renames are cheap but still filesystem I/O
+FILE_BATCH = 50
+# Tables keyed by document_id that must not outlive their document
+ORPHAN_TABLES = ("document_texts", "document_signatures", "lsh_buckets")
+
+
+class MaintenanceStopped(Exception):
+    """Raised between steps when shutdown asks a run to stop early"""
+
+
+def _database_size() -> int:
+    """Bytes used by app.db and its WAL"""
+    total = 0
+    for path in (db.DB_PATH, db.DB_PATH + "-wal"):
+        try:
+            total += os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def _remove_orphan_rows(conn, table: str, batch_rows: int, pause) -> int:
+    """Delete rows of table whose document no longer exists, batch_rows per transaction"""
+    removed = 0
+    while True:
+        deleted = conn.execute(
+            f"""DELETE FROM {table} WHERE rowid IN (
+                    SELECT rowid FROM {table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.id = t.document_id)
+                    LIMIT ?
+                )""",
+            (batch_rows,)
+        ).rowcount
+        conn.commit()
+        removed += deleted
+        if deleted < batch_rows:
+            return removed
+        pause()
+
+
+def _expire_uploads() -> dict:
+    """Drop upload sessions idle past their TTL, and part files with no session"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=chunked_upload.UPLOAD_SESSION_TTL_HOURS)
+    expired = db.delete_expired_upload_sessions(cutoff.isoformat())
+    live = db.get_upload_session_ids()
+    stale = [
+        upload_id for upload_id, mtime in chunked_upload.list_part_files()
+        if upload_id not in live and mtime < cutoff.timestamp()
+    ]
+    for upload_id in {*expired, *stale}:
+        chunked_upload.remove_part(upload_id)
+    return {"expired_sessions": len(expired), "stray_part_files": len(stale)}
+
+
+def _prune_tombstones(conn, batch_rows: int, pause) -> int:
+    """Drop export tombstones past retention, batch_rows per transaction.
+
+    Each batch also records, per user, the newest version it dropped, which
+    is how far back incremental exports still work.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=EXPORT_TOMBSTONE_RETENTION_DAYS)).isoformat()
+    pruned = 0
+    while True:
+        rows = conn.execute(
+            """DELETE FROM document_tombstones WHERE rowid IN (
+                   SELECT rowid FROM document_tombstones WHERE deleted_at < ? LIMIT ?
+               ) RETURNING username, version""",
+            (cutoff, batch_rows)
+        ).fetchall()
+        newest = {}
+        for row in rows:
+            newest[row["username"]] = max(newest.get(row["username"], 0), row["version"])
+        conn.executemany(
+            """UPDATE library_versions SET pruned_version = MAX(COALESCE(pruned_version, 0), ?), pruned_before = ?
+               WHERE username = ?""",
+            [(version, cutoff, username) for username, version in newest.items()]
+        )
+        conn.commit()
+        pruned += len(rows)
+        if len(rows) < batch_rows:
+            return pruned
+        pause()
+
+
+def _unlink_all(paths: list) -> int:
+    """Delete files outside any transaction. Returns bytes freed."""
+    freed = 0
+    for path in paths:
+        try:
+            freed += os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+    return freed
+
+
+def _repair_blobs(conn, batch_rows: int, pause) -> dict:
+    """Recount blob references from documents, then collect unreferenced blobs, in batches"""
+    repaired = 0
+    last = ""
+    while True:
+        # Keyset pagination over the primary key: each batch is one short transaction
+        hashes = [
+            row["hash"] for row in conn.execute(
+                "SELECT hash FROM blobs WHERE hash > ? ORDER BY hash LIMIT ?", (last, batch_rows)
+            )
+        ]
+        if hashes:
+            repaired += conn.execute(
+                """UPDATE blobs SET ref_count = (SELECT COUNT(*) FROM documents WHERE blob_hash = blobs.hash)
+                   WHERE hash IN (SELECT value FROM json_each(?))
+                     AND ref_count != (SELECT COUNT(*) FROM documents WHERE blob_hash = blobs.hash)""",
+                (json.dumps(hashes),)
+            ).rowcount
+            conn.commit()
+            last = hashes[-1]
+        if len(hashes) < batch_rows:
+            break
+        pause()
+
+    collected = freed = 0
+    while True:
+        # Rows go and files are renamed aside under the write lock, so an upload of the same
+        # content either re-references the blob first or writes a fresh file afterwards
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            garbage = [
+                row["hash"] for row in conn.execute(
+                    """DELETE FROM blobs WHERE hash IN (SELECT hash FROM blobs WHERE ref_count <= 0 LIMIT ?)
+                       RETURNING hash""",
+                    (FILE_BATCH,)
+                ).fetchall()
+            ]
+            retired = [blob_store.move_aside(blob_store.blob_path(h)) for h in garbage]
+        finally:
+            conn.commit()
+        freed += _unlink_all([path for path in retired if path])
+        collected += len(garbage)
+        if len(garbage) < FILE_BATCH:
+            return {"ref_counts_repaired": repaired, "blobs_collected": collected, "bytes_freed": freed}
+        pause()
+
+
+def _remove_stray_blob_files(conn, pause) -> dict:
+    """Delete old blob files with no blobs row and leftover temp files"""
+    cutoff = time.time() - STRAY_FILE_MIN_AGE_SECONDS
+    candidates = []
+    leftovers = []
+    for name, path in blob_store.iter_stored_files():
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        (candidates if blob_store.is_blob_name(name) else leftovers).append((name, path))
+
+    # Temp and renamed-aside files are never referenced, so need no lock
+    removed = len(leftovers)
+    freed = _unlink_all([path for _, path in leftovers])
+    for i in range(0, len(candidates), FILE_BATCH):
+        batch = candidates[i:i + FILE_BATCH]
+        # Check and rename aside under the write lock, so an upload of the same
+        # content cannot start referencing a file we are about to remove
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {
+                row["hash"] for row in conn.execute(
+                    "SELECT hash FROM blobs WHERE hash IN (SELECT value FROM json_each(?))",
+                    (json.dumps([name for name, _ in batch]),)
+                )
+            }
+            retired = [blob_store.move_aside(path) for name, path in batch if name not in known]
+        finally:
+            conn.commit()
+        retired = [path for path in retired if path]
+        removed += len(retired)
+        freed += _unlink_all(retired)
+        pause()
+    return {"files_removed": removed, "bytes_freed": freed}
+
+
+def _incremental_vacuum(conn, step_pages: int, pause) -> int | None:
+    """Release free pages step_pages at a time. Returns pages released, or None if unavailable."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return None
+    released = 0
+    while True:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free == 0:
+            return released
+        step = min(step_pages, free)
+        # executescript steps the pragma to completion; execute() frees only one page
+        conn.executescript(f"PRAGMA incremental_vacuum({step});")
+        released += step
+        pause()
+
+
+def _checkpoint(conn) -> dict:
+    """Checkpoint the WAL and truncate it; gives up quickly if writers are busy"""
+    conn.execute("PRAGMA busy_timeout = 200")
+    busy, log_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {"busy": bool(busy), "log_pages": log_pages, "checkpointed_pages": checkpointed}
+
+
+def run_maintenance(stop: threading.Event | None = None, step_pages: int = DB_MAINTENANCE_STEP_PAGES,
+                    batch_rows: int = DB_MAINTENANCE_BATCH_ROWS, pause_ms: float = DB_MAINTENANCE_PAUSE_MS) -> dict:
+    """Run one maintenance pass (blocking). Returns a report of what was done.
+
+    If stop is set while running, the pass ends after the current step and
+    the report has completed=False.
+    """
+    stop = stop or threading.Event()
+
+    def pause():
+        if stop.wait(pause_ms / 1000):
+            raise MaintenanceStopped()
+
+    start = time.perf_counter()
+    size_before = _database_size()
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "completed": False,
+        "orphan_rows": {},
+    }
+
+    with db.get_db() as conn:
+        try:
+            report["uploads"] = _expire_uploads()
+            report["tombstones_pruned"] = _prune_tombstones(conn, batch_rows, pause)
+            for table in ORPHAN_TABLES:
+                report["orphan_rows"][table] = _remove_orphan_rows(conn, table, batch_rows, pause)
+            report["blobs"] = _repair_blobs(conn, batch_rows, pause)
+            report["stray_blob_files"] = _remove_stray_blob_files(conn, pause)
+
+            released = _incremental_vacuum(conn, step_pages, pause)
+            report["vacuumed_pages"] = released
+            if released is None:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                logger.info(f"Incremental vacuum unavailable ({free} free pages); "
+                            "run `python db_maintenance.py --full-vacuum` once to enable it")
+
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE")
+            conn.commit()
+            report["analyzed"] = True
+
+            report["checkpoint"] = _checkpoint(conn)
+            report["completed"] = True
+        except MaintenanceStopped:
+            logger.info("DB maintenance stopped early")
+
+    size_after = _database_size()
+    report["database_bytes_before"] = size_before
+    report["database_bytes_after"] = size_after
+    report["reclaimed_bytes"] = size_before - size_after
+    report["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def full_vacuum():
+    """Rebuild the whole database (blocking, takes the write lock for its duration).
+
+    Also switches older databases to auto_vacuum=INCREMENTAL so later
+    maintenance runs can reclaim space in small steps.
+    """
+    with db.get_db() as conn:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def claim_run(interval_minutes: float) -> bool:
+    """Record a run as started if the last one is older than the interval. True if claimed."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(minutes=interval_minutes)
+    with db.get_db() as conn:
+        claimed = conn.execute(
+            """INSERT INTO maintenance_runs (name, last_run) VALUES (?, ?)
+               ON CONFLICT(name) DO UPDATE SET last_run = excluded.last_run
+               WHERE last_run <= ?""",
+            (JOB_NAME, now.isoformat(), cutoff.isoformat())
+        ).rowcount
+        conn.commit()
+        return claimed == 1
+
+
+def save_report(report: dict):
+    with db.get_db() as conn:
+        conn.execute("UPDATE maintenance_runs SET report = ? WHERE name = ?", (json.dumps(report), JOB_NAME))
+        conn.commit()
+
+
+def get_last_report() -> dict | None:
+    """Report of the most recent maintenance run, from any worker"""
+    with db.get_db() as conn:
+        row = conn.execute("SELECT report FROM maintenance_runs WHERE name = ?", (JOB_NAME,)).fetchone()
+        return json.loads(row["report"]) if row and row["report"] else None
+
+
+def run_if_due(interval_minutes: float, stop: threading.Event | None = None) -> dict | None:
+    """Run and record a maintenance pass unless one ran within the interval"""
+    if not claim_run(interval_minutes):
+        return None
+    report = run_maintenance(stop)
+    save_report(report)
+    orphans = sum(report["orphan_rows"].values())
+    logger.info(
+        f"DB maintenance: reclaimed {report['reclaimed_bytes'] / 1024:.0f} KB "
+        f"({orphans} orphan rows) in {report['duration_ms']:.0f} ms"
+    )
+    return report
+
+
+class MaintenanceTask:
+    """Background task that runs maintenance in a worker thread when it is due"""
+
+    def __init__(self, interval_minutes: float = DB_MAINTENANCE_INTERVAL_MINUTES):
+        self.interval_minutes = interval_minutes
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        # The pass currently running in a worker thread, if any
+        self._run: asyncio.Future | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self._loop(), name="db-maintenance")
+
+    async def stop(self):
+        if not self.running:
+            return
+        # The worker thread can't be cancelled; the event ends it at the next step
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Don't let shutdown close the database under a pass that is still running
+        if self._run is not None and not self._run.done():
+            try:
+                await self._run
+            except Exception as e:
+                logger.error(f"DB maintenance failed: {e}")
+        self._run = None
+
+    async def _loop(self):
+        poll = min(POLL_SECONDS, self.interval_minutes * 60)
+        while True:
+            # Sleep first so startup traffic never competes with maintenance
+            await asyncio.sleep(poll)
+            self._run = asyncio.ensure_future(asyncio.to_thread(run_if_due, self.interval_minutes, self._stop))
+            try:
+                # Shielded: stop() cancels this loop, then waits for the pass itself
+                await asyncio.shield(self._run)
+            except Exception as e:
+                logger.error(f"DB maintenance failed: {e}")
+
+
+maintenance = MaintenanceTask()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run database maintenance once")
+    parser.add_argument("--force", action="store_true", help="Run even if a pass ran within the interval")
+    parser.add_argument("--full-vacuum", action="store_true",
+                        help="Rebuild the database first and enable incremental vacuum (stop the API first)")
+    args = parser.parse_args()
+
+    db.init_db()
+    if args.full_vacuum:
+        before = _database_size()
+        full_vacuum()
+        logger.info(f"Full vacuum reclaimed {(before - _database_size()) / 1024:.0f} KB")
+
+    report = run_if_due(0 if args.force else DB_MAINTENANCE_INTERVAL_MINUTES)
+    if report is None:
+        print(f"Skipped: maintenance ran within the last {DB_MAINTENANCE_INTERVAL_MINUTES:g} minutes (use --force)")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
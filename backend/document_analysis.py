@@ -0,0 +1,119 @@
+"""Document Analysis Pool - extraction and classification for API uploads
+
+Text extraction, classification and MinHash fingerprinting are pure Python
+and hold the GIL, so on threads concurrent uploads run one at a time. The
+API hands them to a process pool instead, as bulk_import.py does, with one
+classifier per worker process.
+
+Workers are spawned rather than forked, so they never inherit the server's
+writer and maintenance threads. Server-Timing stages cannot be recorded
+from another process: analyze_file returns its stage durations and
+AnalysisPool.analyze adds them to the current request.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from classifier import get_classifier
+from file_utils import extract_document, build_document_metadata
+from server_timing import record_timing
+import similarity
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+MIN_TEXT_LENGTH = 50
+
+
+def _init_worker():
+    """Pool initializer - build the classifier once per worker process"""
+    get_classifier()
+
+
+def _warm_up():
+    """No-op job submitted at startup so workers spawn before the first upload"""
+
+
+def analyze_file(safe_filename: str, file_ext: str, content: bytes) -> tuple[dict | None, dict]:
+    """Extract, classify and fingerprint one file (blocking; runs in a worker).
+
+    Returns (analysis, timings): analysis is None when the file has too
+    little text to classify, and timings maps stage name to seconds.
+    """
+    timings = {}
+    start = time.perf_counter()
+    try:
+        text, page_count = extract_document(content, file_ext)
+    except Exception as e:
+        logger.error(f"Error extracting text from {safe_filename}: {e}")
+        text, page_count = "", None
+    timings["extract"] = time.perf_counter() - start
+
+    if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+        return None, timings
+
+    start = time.perf_counter()
+    category, confidence = get_classifier().classify(text)
+    timings["classify"] = time.perf_counter() - start
+    return {
+        "text": text,
+        "category": category,
+        "confidence": confidence,
+        "metadata": build_document_metadata(content, text, page_count),
+        "signature": similarity.compute_signature(text),
+    }, timings
+
+
+class AnalysisPool:
+    """Process pool for analyze_file, owned by the API's lifespan"""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS):
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+        return executor
+
+    def start(self):
+        self._executor = self._create_executor()
+
+    async def stop(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def analyze(self, safe_filename: str, file_ext: str, content: bytes) -> dict | None:
+        """Run analyze_file in a worker process (or a thread when not started)"""
+        executor = self._executor
+        if executor is None:
+            analysis, timings = await asyncio.to_thread(analyze_file, safe_filename, file_ext, content)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                analysis, timings = await loop.run_in_executor(
+                    executor, analyze_file, safe_filename, file_ext, content
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); later uploads get a fresh pool
+                logger.error(f"Analysis worker died while processing {safe_filename}; restarting the pool")
+                if self._executor is executor:
+                    self._executor = self._create_executor()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        for stage, seconds in timings.items():
+            record_timing(stage, seconds)
+        return analysis
+
+
+pool = AnalysisPool()
@@ -1,38 +1,178 @@
 """DOCX Text Extraction"""
 from io import BytesIO
 import logging
+import re
+import zipfile
+import xml.etree.ElementTree as ET
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_docx(docx_bytes: bytes) -> str:
-    """Extract text from DOCX file"""
+# WordprocessingML namespace
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH = W_NS + "p"
+_TEXT = W_NS + "t"
+_TAB = W_NS + "tab"
+_BREAKS = (W_NS + "br", W_NS + "cr")
+_BODY = W_NS + "body"
+_PART_ROOTS = (W_NS + "hdr", W_NS + "ftr")
+# Markup compatibility: <mc:Fallback> repeats the <mc:Choice> content (e.g. text boxes) for older readers
+_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+_HEADER_RE = re.compile(r"^word/header(\d*)\.xml$")
+_FOOTER_RE = re.compile(r"^word/footer(\d*)\.xml$")
+
+
+def _paragraph_text(paragraph) -> str:
+    """Concatenate the runs of a <w:p> element, keeping tabs and line breaks"""
+    parts = []
+    for elem in paragraph.iter():
+        if elem.tag == _TEXT:
+            if elem.text:
+                parts.append(elem.text)
+        elif elem.tag == _TAB:
+            parts.append("\t")
+        elif elem.tag in _BREAKS:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _iter_part_paragraphs(stream):
+    """Yield paragraph texts from one XML part in document order.
+
+    Uses iterparse and clears each paragraph once read, and each finished
+    top-level block (paragraph or table) from its container, so memory stays
+    bounded by the largest single block rather than the whole document.
+    Table cells are emitted once each, so merged cells are not repeated, and
+    <mc:Fallback> copies are dropped, so text boxes are not repeated either.
+    """
+    container = None
+    container_depth = 0
+    fallback_depth = 0  # Depth of the enclosing <mc:Fallback>, 0 outside one
+    depth = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            # <w:body> in document.xml; the <w:hdr>/<w:ftr> root in header/footer parts
+            if container is None and (elem.tag == _BODY or elem.tag in _PART_ROOTS):
+                container, container_depth = elem, depth
+            elif elem.tag == _FALLBACK and not fallback_depth:
+                fallback_depth = depth
+            continue
+
+        if elem.tag == _PARAGRAPH:
+            if not fallback_depth:
+                text = _paragraph_text(elem)
+                if text.strip():
+                    yield text
+            elem.clear()
+        elif depth == fallback_depth:
+            # Cleared so the enclosing paragraph does not pick up its runs either
+            elem.clear()
+            fallback_depth = 0
+        if container is not None and depth == container_depth + 1:
+            container.clear()
+        depth -= 1
+
+
+def _numbered_parts(names: list, pattern: re.Pattern) -> list:
+    """Part names matching pattern in numeric order (header2.xml before header10.xml)"""
+    numbered = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            numbered.append((int(match.group(1) or 0), name))
+    return [name for _, name in sorted(numbered)]
+
+
+def _read_page_count(stream) -> int | None:
+    """Return the page count in a docProps/app.xml stream, or None if absent.
+
+    DOCX has no fixed pagination; this is the count recorded by the last
+    application that laid the document out.
+    """
     try:
-        from docx import Document
-        
-        docx_file = BytesIO(docx_bytes)
-        document = Document(docx_file)
-        
+        for _, elem in ET.iterparse(stream):
+            if elem.tag.endswith("}Pages") and elem.text:
+                return int(elem.text)
+    except (ValueError, ET.ParseError):
+        pass
+    return None
+
+
+def _extract_streaming(docx_bytes: bytes) -> tuple[str, int | None]:
+    """Fast path: stream word/document.xml (plus headers/footers) and docProps/app.xml
+    from one pass over the archive, without python-docx"""
+    with zipfile.ZipFile(BytesIO(docx_bytes)) as archive:
+        names = archive.namelist()
+        parts = _numbered_parts(names, _HEADER_RE)
+        parts.append("word/document.xml")
+        parts.extend(_numbered_parts(names, _FOOTER_RE))
+
         text_content = []
-        
-        # Extract text from paragraphs
-        for paragraph in document.paragraphs:
-            if paragraph.text and paragraph.text.strip():
-                text_content.append(paragraph.text)
-        
-        # Extract text from tables
-        for table in document.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if cell.text and cell.text.strip():
-                        text_content.append(cell.text)
-        
-        full_text = "\n".join(text_content)
+        for name in parts:
+            with archive.open(name) as stream:
+                text_content.extend(_iter_part_paragraphs(stream))
+
+        page_count = None
+        if "docProps/app.xml" in names:
+            with archive.open("docProps/app.xml") as stream:
+                page_count = _read_page_count(stream)
+
+    return "\n".join(text_content), page_count
+
+
+def _extract_with_python_docx(docx_bytes: bytes) -> tuple[str, int | None]:
+    """Fallback: build the python-docx object model and walk paragraphs and tables"""
+    from docx import Document
+
+    docx_file = BytesIO(docx_bytes)
+    document = Document(docx_file)
+
+    text_content = []
+
+    # Extract text from paragraphs
+    for paragraph in document.paragraphs:
+        if paragraph.text and paragraph.text.strip():
+            text_content.append(paragraph.text)
+
+    # Extract text from tables
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text and cell.text.strip():
+                    text_content.append(cell.text)
+
+    # The already-loaded package holds docProps/app.xml too
+    page_count = None
+    for part in document.part.package.iter_parts():
+        if part.partname == "/docProps/app.xml":
+            page_count = _read_page_count(BytesIO(part.blob))
+
+    return "\n".join(text_content), page_count
+
+
+def extract_docx(docx_bytes: bytes) -> tuple[str, int | None]:
+    """Extract (text, page count) from a DOCX file, opening the archive once"""
+    try:
+        full_text, page_count = _extract_streaming(docx_bytes)
+        logger.info(f"Extracted {len(full_text)} characters from DOCX")
+        return full_text, page_count
+    except Exception as e:
+        logger.warning(f"Streaming DOCX extraction failed, falling back to python-docx: {e}")
+
+    try:
+        full_text, page_count = _extract_with_python_docx(docx_bytes)
         logger.info(f"Extracted {len(full_text)} characters from DOCX")
-        return full_text
+        return full_text, page_count
     except ImportError:
         logger.error("python-docx not installed. Run: pip install python-docx")
-        return ""
+        return "", None
     except Exception as e:
         logger.error(f"DOCX extraction failed: {e}")
-        return ""
+        return "", None
+
+
+def extract_text_from_docx(docx_bytes: bytes) -> str:
+    """Extract text from DOCX file"""
+    return extract_docx(docx_bytes)[0]
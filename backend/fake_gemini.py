@@ -0,0 +1,131 @@
+"""Fake Gemini Server - local stand-in for the generateContent API in load tests
+
+Usage:
+    python fake_gemini.py [--port 8090] [--latency-ms 400] [--jitter-ms 200]
+                          [--error-rate 0.01] [--rate-limit-rate 0.05]
+                          [--burst-every 60] [--burst-seconds 10]
+
+Then point the backend at it:
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=fake python main.py
+
+Responses use the same JSON shape as the real API, so LLMService parses them
+unchanged. 429s can be random (--rate-limit-rate) or arrive as storms: for
+--burst-seconds out of every --burst-every seconds, every request gets 429.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency_ms: float = 400
+    jitter_ms: float = 200
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    burst_every: float = 0
+    burst_seconds: float = 0
+
+
+_SUMMARY = {
+    "summary": "This is a synthetic summary produced by the fake Gemini server for load testing.",
+    "key_points": ["Synthetic key point one", "Synthetic key point two", "Synthetic key point three"],
+    "document_type": "Test Document",
+}
+
+
+def _error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=code, content={"error": {"code": code, "message": message, "status": status}})
+
+
+def create_app(config: FakeGeminiConfig) -> FastAPI:
+    """Build the stub app; stats are kept on app.state for inspection"""
+    app = FastAPI(title="Fake Gemini")
+    app.state.config = config
+    app.state.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+    started = time.monotonic()
+
+    def in_burst() -> bool:
+        if config.burst_every <= 0 or config.burst_seconds <= 0:
+            return False
+        return (time.monotonic() - started) % config.burst_every < config.burst_seconds
+
+    # The SDK calls e.g. /v1beta/models/gemini-2.5-flash:generateContent
+    @app.post("/{api_version}/models/{model_action}")
+    async def generate_content(api_version: str, model_action: str, request: Request):
+        stats = app.state.stats
+        stats["requests"] += 1
+        model, _, action = model_action.partition(":")
+        if action != "generateContent":
+            return _error(404, "NOT_FOUND", f"Unsupported action: {action}")
+
+        body = await request.json()
+        latency = max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms))
+        await asyncio.sleep(latency / 1000)
+
+        if in_burst() or random.random() < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return _error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            return _error(500, "INTERNAL", "An internal error has occurred.")
+
+        prompt_chars = sum(
+            len(part.get("text", ""))
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        stats["ok"] += 1
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": json.dumps(_SUMMARY)}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_chars // 4,
+                "candidatesTokenCount": 60,
+                "totalTokenCount": prompt_chars // 4 + 60,
+            },
+            "modelVersion": model,
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Gemini generateContent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--burst-every", type=float, default=0, help="Seconds between 429 storms (0 = off)")
+    parser.add_argument("--burst-seconds", type=float, default=0, help="Length of each 429 storm")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeGeminiConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""File Handling Helpers shared by the API and CLI tools"""
+import hashlib
+import os
+import re
+
+from pdf_utils import extract_pdf
+from docx_utils import extract_docx
+
+ALLOWED_EXTENSIONS = ['.pdf', '.docx']
+PREVIEW_LENGTH = 300
+
+MEDIA_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+
+def sanitize_filename(filename: str) -> str:
+    """Sanitize filename to prevent path traversal and injection"""
+    # Remove path separators and null bytes
+    filename = os.path.basename(filename)
+    filename = filename.replace('\x00', '')
+    # Keep only safe characters
+    filename = re.sub(r'[^\w\s\-\.]', '_', filename)
+    return filename[:255]  # Limit length
+
+
+def get_file_extension(filename: str) -> str | None:
+    """Return the supported extension of a filename, or None if unsupported"""
+    filename_lower = filename.lower()
+    for ext in ALLOWED_EXTENSIONS:
+        if filename_lower.endswith(ext):
+            return ext
+    return None
+
+
+def extract_document(content: bytes, file_ext: str) -> tuple[str, int | None]:
+    """Extract (text, page count) from a supported file, parsing it only once"""
+    if file_ext == '.pdf':
+        return extract_pdf(content)
+    if file_ext == '.docx':
+        return extract_docx(content)
+    return "", None
+
+
+def build_document_metadata(content: bytes, text: str, page_count: int | None) -> dict:
+    """Compute the listing metadata stored on each documents row at ingest"""
+    preview = re.sub(r'\s+', ' ', text).strip()
+    if len(preview) > PREVIEW_LENGTH:
+        preview = preview[:PREVIEW_LENGTH].rsplit(' ', 1)[0] + '...'
+    
+    return {
+        "text_preview": preview,
+        "char_count": len(text),
+        "word_count": len(text.split()),
+        "page_count": page_count,
+        "content_hash": hashlib.sha256(content).hexdigest(),
+    }
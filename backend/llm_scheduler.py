@@ -0,0 +1,414 @@
+"""Quota-Aware LLM Scheduler - paces Gemini calls to the configured RPM/TPM
+
+Calls are queued and released only when both token buckets (requests per
+minute and tokens per minute) have room, so the API quota is respected up
+front instead of discovered through 429s. Queued work is ordered by
+priority (interactive before batch) and, within a priority, round-robin
+across users so one heavy user cannot starve the rest.
+
+The Gemini quota belongs to the API key, not to a process. By default the
+bucket levels live in a SQLite file (the rate limiter's, see
+rate_limit_storage.py), so every `uvicorn --workers N` process draws from
+one shared budget. Use LLM_QUOTA_STORAGE_URI=memory:// for a single process.
+Queues and concurrency limits stay per worker.
+
+A call that still gets a 429 raises RateLimitedError. The job then goes back
+to the front of its user's queue with exponential backoff, and each retry is
+charged to the buckets again, so no Gemini request bypasses the quota.
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+
+from rate_limit_storage import DEFAULT_PATH, ThreadLocalConnections
+
+logger = logging.getLogger(__name__)
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "10"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "250000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_QUOTA_STORAGE_URI = os.getenv("LLM_QUOTA_STORAGE_URI", f"sqlite://{DEFAULT_PATH}")
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "5"))
+
+# Pause after the quota store fails (e.g. "database is locked") before trying again
+QUOTA_ERROR_BACKOFF_SECONDS = 1.0
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class RateLimitedError(Exception):
+    """Raised by a submitted call that was rejected with a 429.
+
+    The scheduler requeues the job with backoff. Once LLM_RATE_LIMIT_RETRIES
+    are used up, submit() returns result, or raises this error if result is None.
+    """
+
+    def __init__(self, message: str = "Rate limited", result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class MemoryQuota:
+    """RPM/TPM buckets held by this process only"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.buckets = {"requests": TokenBucket(rpm), "tokens": TokenBucket(tpm)}
+        self.capacity = {name: bucket.capacity for name, bucket in self.buckets.items()}
+
+    def reserve(self, costs: dict) -> float:
+        """Take costs from every bucket and return 0, or leave them and return the wait in seconds"""
+        wait = max(self.buckets[name].time_until(amount) for name, amount in costs.items())
+        if wait == 0:
+            for name, amount in costs.items():
+                self.buckets[name].consume(amount)
+        return wait
+
+    def available(self) -> dict:
+        return {name: bucket.available() for name, bucket in self.buckets.items()}
+
+
+class SQLiteQuota:
+    """RPM/TPM buckets in a SQLite file shared by every worker on the host.
+
+    Each bucket is one row (level, last update in wall-clock seconds).
+    reserve() refills and debits all buckets in one IMMEDIATE transaction, so
+    two workers can never spend the same tokens.
+    """
+
+    def __init__(self, path: str, rpm: float, tpm: float):
+        self.path = path
+        self.capacity = {"requests": rpm, "tokens": tpm}
+        self._connections = ThreadLocalConnections(path, """
+            CREATE TABLE IF NOT EXISTS llm_quota (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _levels(self, conn: sqlite3.Connection, now: float) -> dict:
+        """Current level of every bucket; a bucket never seen before starts full"""
+        stored = {name: (tokens, updated) for name, tokens, updated in conn.execute("SELECT * FROM llm_quota")}
+        levels = {}
+        for name, capacity in self.capacity.items():
+            tokens, updated = stored.get(name, (capacity, now))
+            levels[name] = min(capacity, tokens + max(0.0, now - updated) * capacity / 60.0)
+        return levels
+
+    def reserve(self, costs: dict) -> float:
+        """Take costs from every bucket and return 0, or leave them and return the wait in seconds"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            levels = self._levels(conn, now)
+            costs = {name: min(amount, self.capacity[name]) for name, amount in costs.items()}
+            wait = max(
+                0.0 if levels[name] >= amount else (amount - levels[name]) * 60.0 / self.capacity[name]
+                for name, amount in costs.items()
+            )
+            if wait == 0:
+                conn.executemany(
+                    """
+                    INSERT INTO llm_quota (name, tokens, updated) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+                    """,
+                    [(name, levels[name] - amount, now) for name, amount in costs.items()]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def available(self) -> dict:
+        return self._levels(self._connect(), time.time())
+
+
+def create_quota(uri: str, rpm: float, tpm: float):
+    """memory:// for per-process buckets, sqlite:///path.db to share them (sqlite:// = default file)"""
+    if uri.startswith("memory://"):
+        return MemoryQuota(rpm, tpm)
+    if uri.startswith("sqlite://"):
+        return SQLiteQuota(uri[len("sqlite://"):] or DEFAULT_PATH, rpm, tpm)
+    raise ValueError(f"Unsupported LLM quota storage: {uri}")
+
+
+class _Job:
+    __slots__ = ("username", "priority", "tokens", "func", "args", "future", "enqueued", "attempts", "not_before")
+
+    def __init__(self, username, priority, tokens, func, args, future):
+        self.username = username
+        self.priority = priority
+        self.tokens = tokens
+        self.func = func
+        self.args = args
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+        # Monotonic time before which a rate-limited job is not retried
+        self.not_before = 0.0
+
+
+class LLMScheduler:
+    """Priority + per-user fair-share queue in front of blocking LLM calls"""
+
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 storage_uri: str = LLM_QUOTA_STORAGE_URI):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.storage_uri = storage_uri
+        # Built in start(), so importing the module does no I/O
+        self.quota = None
+        self.max_concurrency = max_concurrency
+        # priority -> username -> deque of jobs; user order is the round-robin order
+        self._queues = {level: OrderedDict() for level in sorted(PRIORITIES.values())}
+        self._wakeup: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+        self._waits = deque(maxlen=500)
+        self._dispatched = 0
+        self._retried = 0
+        self._in_flight = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.quota is None:
+            self.quota = create_quota(self.storage_uri, self.rpm, self.tpm)
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.create_task(self._dispatch_loop(), name="llm-scheduler")
+        self._task.add_done_callback(self._dispatcher_exited)
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._fail_pending(None)
+
+    def _fail_pending(self, error: BaseException | None):
+        """Resolve every queued job: with error, or cancelled if None"""
+        for users in self._queues.values():
+            for jobs in users.values():
+                for job in jobs:
+                    if job.future.done():
+                        continue
+                    if error is None:
+                        job.future.cancel()
+                    else:
+                        job.future.set_exception(error)
+            users.clear()
+
+    def _dispatcher_exited(self, task: asyncio.Task):
+        # Nothing will dispatch the queue any more; never leave callers waiting
+        if task.cancelled():
+            self._fail_pending(None)
+            return
+        error = task.exception()
+        logger.error(f"LLM scheduler stopped unexpectedly: {error!r}")
+        self._fail_pending(RuntimeError("LLM scheduler stopped"))
+
+    async def submit(self, username: str, func: Callable, *args, tokens: int = 0, priority: str = "interactive"):
+        """Queue a blocking call and wait for its result.
+
+        tokens is the estimated prompt + reply size charged against TPM. Without
+        a dispatcher (never started or stopped, e.g. scripts) the call runs
+        immediately in a thread, once.
+        """
+        if self._task is None:
+            try:
+                return await asyncio.to_thread(func, *args)
+            except RateLimitedError as e:
+                if e.result is None:
+                    raise
+                return e.result
+        if not self.running:
+            raise RuntimeError("LLM scheduler stopped")
+
+        level = PRIORITIES.get(priority, PRIORITIES["batch"])
+        future = asyncio.get_running_loop().create_future()
+        self._queues[level].setdefault(username, deque()).append(
+            _Job(username, level, tokens, func, args, future)
+        )
+        self._wakeup.set()
+        return await future
+
+    def _peek(self) -> tuple:
+        """(next job, 0), or (None, seconds until a backed-off job is due; None if the queue is empty).
+
+        The next job is the first ready one: highest priority, then the user at
+        the front of the rotation.
+        """
+        now = time.monotonic()
+        due = None
+        for users in self._queues.values():
+            for jobs in users.values():
+                job = jobs[0]
+                if job.not_before <= now or job.future.cancelled():
+                    return job, 0.0
+                due = job.not_before - now if due is None else min(due, job.not_before - now)
+        return None, due
+
+    def _pop(self, job: _Job):
+        users = self._queues[job.priority]
+        jobs = users[job.username]
+        jobs.popleft()
+        # Rotate: the user goes to the back of the line, or leaves it if done
+        del users[job.username]
+        if jobs:
+            users[job.username] = jobs
+
+    def _requeue(self, job: _Job):
+        """Put a rate-limited job back at the front of its user's queue, after a backoff"""
+        delay = LLM_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+        job.not_before = time.monotonic() + delay * random.uniform(0.8, 1.2)
+        users = self._queues[job.priority]
+        users.setdefault(job.username, deque()).appendleft(job)
+        self._retried += 1
+        self._wakeup.set()
+
+    async def _sleep(self, seconds: float | None):
+        """Wait up to seconds (forever if None), waking early if new work arrives"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch_loop(self):
+        while True:
+            job, due = self._peek()
+            if job is None:
+                await self._sleep(due)
+                continue
+            if job.future.cancelled():
+                self._pop(job)
+                continue
+
+            await self._slots.acquire()
+            # The queue may have changed while waiting for a slot
+            job, _ = self._peek()
+            if job is None or job.future.cancelled():
+                self._slots.release()
+                continue
+
+            try:
+                wait = await asyncio.to_thread(self.quota.reserve, {"requests": 1, "tokens": job.tokens})
+            except Exception as e:
+                logger.warning(f"LLM quota store unavailable, retrying: {e}")
+                self._slots.release()
+                await asyncio.sleep(QUOTA_ERROR_BACKOFF_SECONDS)
+                continue
+            if wait > 0:
+                self._slots.release()
+                # Wake early if new work arrives; it may outrank the current head
+                await self._sleep(wait)
+                continue
+
+            self._pop(job)
+            if job.attempts == 0:
+                self._waits.append(time.monotonic() - job.enqueued)
+            job.attempts += 1
+            self._dispatched += 1
+            asyncio.create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        self._in_flight += 1
+        try:
+            result = await asyncio.to_thread(job.func, *job.args)
+        except RateLimitedError as e:
+            if job.attempts <= LLM_RATE_LIMIT_RETRIES and self.running and not job.future.done():
+                logger.info(f"LLM call rate limited; retry {job.attempts}/{LLM_RATE_LIMIT_RETRIES} queued")
+                self._requeue(job)
+            elif not job.future.done():
+                if e.result is None:
+                    job.future.set_exception(e)
+                else:
+                    job.future.set_result(e.result)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def stats(self) -> dict:
+        """Queue depth, wait times and remaining quota, for monitoring"""
+        waits = sorted(self._waits)
+        available = await asyncio.to_thread(self.quota.available) if self.quota else {}
+        depth = {
+            name: sum(len(jobs) for jobs in self._queues[level].values())
+            for name, level in PRIORITIES.items()
+        }
+        return {
+            "running": self.running,
+            "queue_depth": depth,
+            "queued_users": len({user for users in self._queues.values() for user in users}),
+            "in_flight": self._in_flight,
+            "dispatched": self._dispatched,
+            "rate_limit_retries": self._retried,
+            "wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                "max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            },
+            "quota": {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "requests_available": round(available["requests"], 2) if available else None,
+                "tokens_available": round(available["tokens"]) if available else None,
+            },
+        }
+
+
+scheduler = LLMScheduler()
@@ -2,22 +2,28 @@
 import os
 import json
 import logging
-import time
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 
+from llm_scheduler import RateLimitedError
+
 # Load environment variables
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Expected size of a summary reply, used for quota estimates before sending
+SUMMARY_OUTPUT_TOKENS = 200
+
 
 class LLMService:
     """Service for AI-powered document summarization using Gemini"""
     
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY", "")
+        # Optional API endpoint override, e.g. the local fake_gemini.py server for load tests
+        self.base_url = os.getenv("GEMINI_BASE_URL", "")
         self.client = None
         self.is_available = False
         # Use gemini-2.5-flash - confirmed working!
@@ -38,9 +44,11 @@ class LLMService:
             from google import genai
             
             # Create client with API key
-            self.client = genai.Client(api_key=self.api_key)
+            http_options = {"base_url": self.base_url} if self.base_url else None
+            self.client = genai.Client(api_key=self.api_key, http_options=http_options)
             self.is_available = True
-            logger.info(f"✅ LLM Service initialized with {self.model_name}")
+            logger.info(f"✅ LLM Service initialized with {self.model_name}"
+                        + (f" at {self.base_url}" if self.base_url else ""))
             
         except ImportError as e:
             logger.error(f"google-genai not installed: {e}")
@@ -49,31 +57,49 @@ class LLMService:
             logger.error(f"Failed to initialize Gemini: {e}")
             self.is_available = False
     
-    def _call_with_retry(self, prompt: str, max_retries: int = 3) -> Optional[str]:
-        """Call the API with retry logic for rate limits"""
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
-                )
-                return response.text
-            except Exception as e:
-                error_str = str(e)
-                if "429" in error_str or "Too Many Requests" in error_str or "RESOURCE_EXHAUSTED" in error_str:
-                    wait_time = (attempt + 1) * 3  # 3, 6, 9 seconds
-                    logger.info(f"Rate limited. Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.error(f"API error: {error_str}")
-                    raise e
-        return None
+    def _call(self, prompt: str) -> Optional[str]:
+        """Call the API once. A 429 raises RateLimitedError; llm_scheduler retries it."""
+        try:
+            response = self.client.models.generate_content(
+                model=self.model_name,
+                contents=prompt
+            )
+            return response.text
+        except Exception as e:
+            error_str = str(e)
+            if "429" in error_str or "Too Many Requests" in error_str or "RESOURCE_EXHAUSTED" in error_str:
+                raise RateLimitedError(error_str[:200], result={
+                    "success": False,
+                    "error": "Rate limit reached. Please wait 30 seconds and try again.",
+                    "summary": None,
+                    "key_points": []
+                }) from e
+            logger.error(f"API error: {error_str}")
+            raise
+    
+    def _build_summary_prompt(self, text: str) -> str:
+        """Build the summarization prompt for a document"""
+        # Truncate text to minimize tokens (first 1500 chars)
+        truncated_text = text[:1500] if len(text) > 1500 else text
+        
+        # Simple, efficient prompt
+        return f"""Summarize this document briefly. Return ONLY valid JSON with this format:
+{{"summary": "2-3 sentence summary here", "key_points": ["key point 1", "key point 2", "key point 3"], "document_type": "type of document"}}
+
+Document content:
+{truncated_text}
+
+Return ONLY the JSON, nothing else."""
+    
+    def estimate_summary_tokens(self, text: str) -> int:
+        """Rough token cost of summarize_document: ~4 chars per prompt token plus the reply"""
+        return len(self._build_summary_prompt(text)) // 4 + SUMMARY_OUTPUT_TOKENS
     
     def summarize_document(self, text: str, filename: str = "") -> Dict[str, Any]:
         """
         Generate a concise summary of the document.
-        Uses minimal tokens for efficiency.
+        Uses minimal tokens for efficiency. Raises RateLimitedError on a 429,
+        so run it through llm_scheduler, which requeues the call with backoff.
         """
         if not self.is_available or not self.client:
             return {
@@ -83,25 +109,15 @@ class LLMService:
                 "key_points": []
             }
         
-        # Truncate text to minimize tokens (first 1500 chars)
-        truncated_text = text[:1500] if len(text) > 1500 else text
-        
-        # Simple, efficient prompt
-        prompt = f"""Summarize this document briefly. Return ONLY valid JSON with this format:
-{{"summary": "2-3 sentence summary here", "key_points": ["key point 1", "key point 2", "key point 3"], "document_type": "type of document"}}
-
-Document content:
-{truncated_text}
-
-Return ONLY the JSON, nothing else."""
+        prompt = self._build_summary_prompt(text)
 
         try:
-            response_text = self._call_with_retry(prompt)
+            response_text = self._call(prompt)
             
             if not response_text:
                 return {
                     "success": False,
-                    "error": "Failed to get response from LLM after retries. Please wait a moment and try again.",
+                    "error": "Empty response from LLM. Please wait a moment and try again.",
                     "summary": None,
                     "key_points": []
                 }
@@ -117,19 +133,12 @@ Return ONLY the JSON, nothing else."""
                 "error": None
             }
             
+        except RateLimitedError:
+            raise
         except Exception as e:
             error_msg = str(e)
             logger.error(f"LLM summarization failed: {error_msg}")
             
-            # Provide helpful error message
-            if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                return {
-                    "success": False,
-                    "error": "Rate limit reached. Please wait 30 seconds and try again.",
-                    "summary": None,
-                    "key_points": []
-                }
-            
             return {
                 "success": False,
                 "error": f"LLM Error: {error_msg[:100]}",
@@ -0,0 +1,213 @@
+"""End-to-End Load Test - concurrent user journeys with per-endpoint latency stats
+
+Usage:
+    python load_test.py [--users 20] [--iterations 3] [--fake-gemini] [--base-url URL]
+
+By default the API runs in-process over ASGI against a throwaway data
+directory, with rate limits disabled so they don't cap the measurement
+(--keep-rate-limits re-enables them). With --fake-gemini a local
+fake_gemini.py server is started on a background thread and LLMService is
+pointed at it, so /summarize can be hammered without real quota. Use
+--base-url to drive an already running server over HTTP instead.
+
+Each virtual user signs up, logs in, then repeats: upload, list categories,
+list documents, summarize, download ZIP. The report shows request count,
+errors, p50/p95/p99 latency and throughput per endpoint.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+SAMPLE_TEXTS = [
+    "This agreement is made between the parties hereby. The terms and conditions are legally binding "
+    "and the jurisdiction shall be the court of the state. Liability and indemnity apply. ",
+    "Quarterly report: the analysis of performance metrics shows upward trends. Methodology, findings "
+    "and recommendations are summarized in the executive summary with statistics. ",
+    "Resume. Professional summary: software engineer with work experience and education in computer "
+    "science. Skills include Python. Certifications and references available. ",
+]
+
+
+def make_docx(text: str) -> bytes:
+    """Build a small DOCX in memory with the given text repeated"""
+    from docx import Document
+    document = Document()
+    for _ in range(8):
+        document.add_paragraph(text + f" Reference {uuid.uuid4().hex[:8]}.")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects latency samples and status codes per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, name: str, coro) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await coro
+        except Exception:
+            self.latencies[name].append((time.perf_counter() - start) * 1000)
+            self.errors[name] += 1
+            self.statuses[name]["exception"] += 1
+            return None
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        self.statuses[name][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> str:
+        lines = [
+            f"{'endpoint':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}  statuses",
+        ]
+        total = 0
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            total += len(values)
+            statuses = ", ".join(f"{code}:{count}" for code, count in sorted(self.statuses[name].items(), key=str))
+            lines.append(
+                f"{name:<18}{len(values):>7}{self.errors[name]:>8}"
+                f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}"
+                f"{len(values) / elapsed:>9.1f}  {statuses}"
+            )
+        lines.append(f"\nTotal: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+        return "\n".join(lines)
+
+
+async def user_journey(client: httpx.AsyncClient, recorder: Recorder, iterations: int, summaries: int):
+    """One virtual user: signup, login, then repeated upload/list/summarize/zip"""
+    username = f"load_{uuid.uuid4().hex[:10]}"
+    password = "loadtest123"
+
+    await recorder.call("signup", client.post("/signup", json={
+        "username": username, "email": f"{username}@example.com", "password": password
+    }))
+    response = await recorder.call("login", client.post("/login", json={"username": username, "password": password}))
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    for _ in range(iterations):
+        data = make_docx(random.choice(SAMPLE_TEXTS))
+        response = await recorder.call("upload", client.post(
+            "/upload-documents", headers=headers,
+            files=[("files", (f"doc_{uuid.uuid4().hex[:6]}.docx", data))]
+        ))
+        doc_ids = []
+        if response is not None and response.status_code == 200:
+            doc_ids = [r["id"] for r in response.json().get("results", []) if "id" in r]
+
+        response = await recorder.call("categories", client.get("/categories", headers=headers))
+        if response is not None and response.status_code == 200:
+            category = max(response.json()["categories"].items(), key=lambda item: item[1])[0]
+            await recorder.call("documents", client.get("/documents", params={"category": category}, headers=headers))
+
+        for doc_id in doc_ids[:summaries]:
+            await recorder.call("summarize", client.post("/summarize", json={"document_id": doc_id}, headers=headers))
+
+        await recorder.call("download-zip", client.get("/download-zip", headers=headers))
+
+
+def start_fake_gemini(port: int, args) -> None:
+    """Run fake_gemini.py's app on a daemon thread and wait until it accepts requests"""
+    import uvicorn
+    from fake_gemini import FakeGeminiConfig, create_app
+
+    config = FakeGeminiConfig(
+        latency_ms=args.gemini_latency_ms,
+        jitter_ms=args.gemini_latency_ms / 2,
+        rate_limit_rate=args.gemini_429_rate,
+    )
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+async def run(args) -> str:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+        lifespan = None
+    else:
+        # Configure the in-process app before importing it
+        data_dir = args.data_dir or tempfile.mkdtemp(prefix="sdo-load-")
+        os.environ.setdefault("RATE_LIMIT_STORAGE_URI", "memory://")
+        os.environ.setdefault("LLM_QUOTA_STORAGE_URI", "memory://")
+        os.environ["BLOB_DIR"] = os.path.join(data_dir, "blobs")
+
+        import database as db
+        db.DB_PATH = os.path.join(data_dir, "app.db")
+        import main
+
+        main.limiter.enabled = args.keep_rate_limits
+        lifespan = main.app.router.lifespan_context(main.app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=120)
+        print(f"In-process app, data dir: {data_dir}")
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    try:
+        async with client:
+            await asyncio.gather(*[
+                user_journey(client, recorder, args.iterations, args.summaries)
+                for _ in range(args.users)
+            ])
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return recorder.report(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Smart Document Organizer API")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=3, help="Upload/list/summarize/zip rounds per user")
+    parser.add_argument("--summaries", type=int, default=1, help="Summaries per uploaded batch")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--data-dir", help="Data directory for the in-process app (default: temp dir)")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="Leave slowapi limits enabled")
+    parser.add_argument("--fake-gemini", action="store_true", help="Start a local fake Gemini server")
+    parser.add_argument("--fake-gemini-port", type=int, default=8090)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--gemini-429-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.fake_gemini:
+        if args.base_url:
+            parser.error("--fake-gemini only configures the in-process app; start fake_gemini.py yourself for --base-url")
+        start_fake_gemini(args.fake_gemini_port, args)
+        os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{args.fake_gemini_port}"
+        os.environ["GEMINI_API_KEY"] = "fake-load-test-key"
+
+    print(asyncio.run(run(args)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
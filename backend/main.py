@@ -1,13 +1,16 @@
 """FastAPI Backend Application - Smart Document Organizer (Production Ready)"""
-from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, FileResponse, StreamingResponse
+from email.utils import format_datetime
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, model_validator
+import asyncio
+import json
 import uuid
 import os
-import re
 import logging
 from dotenv import load_dotenv
 
@@ -15,6 +18,7 @@ from dotenv import load_dotenv
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+import rate_limit_storage  # noqa: F401 - registers the sqlite:// storage scheme
 
 # Load environment variables first
 load_dotenv()
@@ -27,12 +31,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from auth import hash_password, verify_password, create_token, verify_token
-from classifier import DocumentClassifier
-from pdf_utils import extract_text_from_pdf
-from docx_utils import extract_text_from_docx
+from file_utils import sanitize_filename, get_file_extension, MEDIA_TYPES
 from models import SignupRequest, LoginRequest, User, Document
 from llm_service import get_llm_service
+from llm_scheduler import scheduler as llm_scheduler
 import database as db
+import async_db as adb
+import blob_store
+import similarity
+import db_maintenance
+import chunked_upload
+from document_analysis import pool as analysis_pool
+from server_timing import ServerTimingMiddleware, SERVER_TIMING_ENABLED, timed
 
 # ========================================
 # Configuration from Environment
@@ -40,15 +50,39 @@ import database as db
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", f"sqlite://{rate_limit_storage.DEFAULT_PATH}")
+MAX_BULK_IDS = int(os.getenv("MAX_BULK_IDS", "5000"))
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "50"))
+
+CATEGORIES = ["Resume", "Report", "Legal Document", "Other"]
+
+# Rate limiter - uses IP address for identification. Counters live in a shared
+# SQLite file by default so limits hold across `uvicorn --workers N`.
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """One-time startup work, run per worker before it serves requests"""
+    db.init_db()
+    analysis_pool.start()
+    adb.writer.start()
+    llm_scheduler.start()
+    if db_maintenance.DB_MAINTENANCE_ENABLED:
+        db_maintenance.maintenance.start()
+    yield
+    await db_maintenance.maintenance.stop()
+    await llm_scheduler.stop()
+    await adb.writer.stop()
+    await analysis_pool.stop()
 
-# Rate limiter - uses IP address for identification
-limiter = Limiter(key_func=get_remote_address)
 
 # Initialize app
 app = FastAPI(
     title="Smart Document Organizer",
     description="AI-powered document classification and summarization",
-    version="2.2.0"
+    version="2.2.0",
+    lifespan=lifespan
 )
 
 # Add rate limiter to app state and exception handler
@@ -62,20 +96,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Export-Cursor"],
 )
 
-# Initialize database on startup
-db.init_db()
-
-# ML Classifier
-classifier = DocumentClassifier()
-
+# Server-Timing header with per-stage durations (auth, db, extraction, ...)
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
 
 # ========================================
 # Request/Response Models
 # ========================================
 class SummarizeRequest(BaseModel):
     document_id: str
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 class SummarizeResponse(BaseModel):
@@ -86,31 +119,66 @@ class SummarizeResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BulkSelection(BaseModel):
+    """Selects documents either by explicit IDs or by their current category"""
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=MAX_BULK_IDS)
+    category: Optional[str] = None
+
+    @model_validator(mode="after")
+    def exactly_one_selector(self):
+        if (self.ids is None) == (self.category is None):
+            raise ValueError("Provide exactly one of 'ids' or 'category'")
+        return self
+
+
+class BulkRecategorizeRequest(BulkSelection):
+    new_category: str
+
+
+class UploadInitRequest(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    sha256: Optional[str] = None  # Whole-file hash, checked when the upload is completed
+
+
 # ========================================
 # Helper Functions
 # ========================================
-def get_current_user(authorization: str = Header(None)) -> str:
+async def get_current_user(authorization: str = Header(None)) -> str:
     """Get username from token"""
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="No token provided")
     
     token = authorization.split(' ')[1]
-    username = verify_token(token)
-    
-    if not username or not db.user_exists(username):
+    with timed("auth"):
+        username = verify_token(token)
+    # Timed as "db", so the lookup is not counted under "auth" as well
+    if not username or not await adb.user_exists(username):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
     return username
 
 
-def sanitize_filename(filename: str) -> str:
-    """Sanitize filename to prevent path traversal and injection"""
-    # Remove path separators and null bytes
-    filename = os.path.basename(filename)
-    filename = filename.replace('\x00', '')
-    # Keep only safe characters
-    filename = re.sub(r'[^\w\s\-\.]', '_', filename)
-    return filename[:255]  # Limit length
+async def library_cache_headers(username: str, library_version: tuple | None = None) -> dict:
+    """Build ETag/Last-Modified headers from the user's library version (looked up if not given)"""
+    version, updated_at = library_version or await adb.get_library_version(username)
+    headers = {
+        "ETag": f'"v{version}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if updated_at:
+        headers["Last-Modified"] = format_datetime(datetime.fromisoformat(updated_at), usegmt=True)
+    return headers
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
 
 
 # ========================================
@@ -120,14 +188,14 @@ def sanitize_filename(filename: str) -> str:
 @limiter.limit("5/minute")  # Prevent brute force registration
 async def signup(request: Request, body: SignupRequest):
     """Create new account"""
-    if db.user_exists(body.username):
+    if await adb.user_exists(body.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     
-    if db.email_exists(body.email):
+    if await adb.email_exists(body.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     password_hash = hash_password(body.password)
-    db.create_user(body.username, body.email, password_hash)
+    await adb.create_user(body.username, body.email, password_hash)
     
     logger.info(f"New user registered: {body.username}")
     return {"message": "Account created successfully", "username": body.username}
@@ -137,7 +205,7 @@ async def signup(request: Request, body: SignupRequest):
 @limiter.limit("10/minute")  # Prevent brute force login
 async def login(request: Request, body: LoginRequest):
     """Login user"""
-    user = db.get_user(body.username)
+    user = await adb.get_user(body.username)
     
     if not user:
         logger.warning(f"Login attempt for non-existent user: {body.username}")
@@ -155,33 +223,77 @@ async def login(request: Request, body: LoginRequest):
 # ========================================
 # Routes - Documents
 # ========================================
+async def process_upload(username: str, safe_filename: str, file_ext: str, content: bytes) -> dict:
+    """Analyze one uploaded file in the analysis pool and store it. Returns its result entry."""
+    analysis = await analysis_pool.analyze(safe_filename, file_ext, content)
+    
+    if analysis is None:
+        return {
+            "filename": safe_filename,
+            "category": "Other",
+            "confidence": 0.70
+        }
+    
+    signature = analysis["signature"]
+    metadata = analysis["metadata"]
+    duplicates = await adb.find_similar_documents(username, signature) if signature else []
+    
+    doc_id = str(uuid.uuid4())
+    timestamp = datetime.now().isoformat()
+    
+    # Store document and text in database
+    await adb.add_document(
+        doc_id=doc_id,
+        username=username,
+        filename=safe_filename,
+        category=analysis["category"],
+        confidence=analysis["confidence"],
+        timestamp=timestamp,
+        text=analysis["text"],
+        metadata=metadata,
+        content=content,
+        signature=signature
+    )
+    
+    return {
+        "id": doc_id,
+        "filename": safe_filename,
+        "category": analysis["category"],
+        "confidence": round(analysis["confidence"], 3),
+        "page_count": metadata["page_count"],
+        "word_count": metadata["word_count"],
+        "likely_duplicate": bool(duplicates),
+        "duplicates": duplicates[:3]
+    }
+
+
 @app.post("/upload-documents")
 @limiter.limit("10/minute")
 async def upload_documents(
     request: Request,
     files: List[UploadFile] = File(...),
+    stream: bool = Query(False, description="Stream one NDJSON line per file as it finishes"),
     username: str = Header(None, alias="Authorization")
 ):
-    """Upload and classify documents (PDF and DOCX supported)"""
-    username = get_current_user(username)
+    """Upload and classify documents (PDF and DOCX supported).
+    
+    Files are processed concurrently. With ?stream=true the response is NDJSON:
+    one line per file in completion order (with its "index" in the upload),
+    then a final {"done": true, ...} line.
+    """
+    username = await get_current_user(username)
     
     if len(files) > 5:
         raise HTTPException(status_code=400, detail="Maximum 5 files allowed per upload")
     
-    allowed_extensions = ['.pdf', '.docx']
-    results = []
-    
+    # Validate every file before processing any, so errors are still plain 400s
+    uploads = []
     for file in files:
         # Sanitize filename
         safe_filename = sanitize_filename(file.filename)
         
         # Check file extension
-        filename_lower = safe_filename.lower()
-        file_ext = None
-        for ext in allowed_extensions:
-            if filename_lower.endswith(ext):
-                file_ext = ext
-                break
+        file_ext = get_file_extension(safe_filename)
         
         if not file_ext:
             raise HTTPException(
@@ -198,84 +310,310 @@ async def upload_documents(
                 detail=f"{safe_filename} exceeds maximum file size of {MAX_FILE_SIZE_MB}MB"
             )
         
-        # Extract text based on file type
+        uploads.append((safe_filename, file_ext, content))
+    
+    async def upload_result(upload: tuple) -> dict:
+        """One file's result entry; a failure is reported for that file only"""
         try:
-            if file_ext == '.pdf':
-                text = extract_text_from_pdf(content)
-            elif file_ext == '.docx':
-                text = extract_text_from_docx(content)
-            else:
-                text = ""
+            return await process_upload(username, *upload)
         except Exception as e:
-            logger.error(f"Error extracting text from {safe_filename}: {e}")
-            text = ""
-        
-        if not text or len(text.strip()) < 50:
-            results.append({
-                "filename": safe_filename,
-                "category": "Other",
-                "confidence": 0.70
-            })
-            continue
-        
-        category, confidence = classifier.classify(text)
-        
-        doc_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
-        
-        # Store document and text in database
-        db.add_document(
-            doc_id=doc_id,
-            username=username,
-            filename=safe_filename,
-            category=category,
-            confidence=confidence,
-            timestamp=timestamp,
-            text=text
+            logger.error(f"Error processing {upload[0]}: {e}")
+            return {"filename": upload[0], "error": "Processing failed"}
+    
+    if not stream:
+        results = await asyncio.gather(*(upload_result(upload) for upload in uploads))
+        logger.info(f"User {username} uploaded {len(results)} documents")
+        return {"message": f"Classified {len(results)} documents", "results": list(results)}
+    
+    async def indexed(index: int, upload: tuple) -> dict:
+        return {"index": index, **await upload_result(upload)}
+    
+    async def ndjson_results():
+        tasks = [asyncio.create_task(indexed(i, upload)) for i, upload in enumerate(uploads)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+        logger.info(f"User {username} uploaded {len(tasks)} documents (streamed)")
+        yield json.dumps({"done": True, "message": f"Classified {len(tasks)} documents"}) + "\n"
+    
+    return StreamingResponse(
+        ndjson_results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ========================================
+# Resumable Chunked Uploads
+# ========================================
+async def get_upload_session_or_404(upload_id: str, username: str) -> dict:
+    """Load the user's upload session, treating idle sessions past their TTL as gone"""
+    session = await adb.get_upload_session(upload_id, username) if chunked_upload.is_upload_id(upload_id) else None
+    if session:
+        idle = datetime.now(timezone.utc) - datetime.fromisoformat(session["updated_at"])
+        if idle.total_seconds() <= chunked_upload.UPLOAD_SESSION_TTL_HOURS * 3600:
+            return session
+    raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+
+def upload_status(session: dict) -> dict:
+    total = chunked_upload.chunk_count(session["size"], session["chunk_size"])
+    received = set(session["received"])
+    return {
+        "upload_id": session["id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": total,
+        "received_chunks": len(received),
+        "missing": [i for i in range(total) if i not in received]
+    }
+
+
+@app.post("/uploads")
+@limiter.limit("30/minute")
+async def init_chunked_upload(
+    request: Request,
+    body: UploadInitRequest,
+    authorization: str = Header(None)
+):
+    """Start a resumable upload for one large document.
+    
+    Send each chunk with PUT /uploads/{upload_id}/chunks/{index} and an
+    X-Chunk-SHA256 header, then POST /uploads/{upload_id}/complete.
+    """
+    username = await get_current_user(authorization)
+    
+    safe_filename = sanitize_filename(body.filename)
+    if not get_file_extension(safe_filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"{safe_filename} is not a supported file type. Only PDF and DOCX files are allowed."
         )
-        
-        results.append({
-            "id": doc_id,
-            "filename": safe_filename,
-            "category": category,
-            "confidence": round(confidence, 3)
-        })
+    if body.size > chunked_upload.MAX_CHUNKED_FILE_SIZE_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{safe_filename} exceeds maximum file size of {chunked_upload.MAX_CHUNKED_FILE_SIZE_MB}MB"
+        )
+    sha256 = body.sha256.lower() if body.sha256 else None
+    if sha256 and not chunked_upload.is_sha256(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be a hex SHA-256 digest")
+    
+    upload_id = uuid.uuid4().hex
+    chunk_size = chunked_upload.UPLOAD_CHUNK_SIZE
+    await asyncio.to_thread(chunked_upload.create_part_file, upload_id, body.size)
+    await adb.create_upload_session(upload_id, username, safe_filename, body.size, chunk_size, sha256)
     
-    logger.info(f"User {username} uploaded {len(results)} documents")
-    return {"message": f"Classified {len(results)} documents", "results": results}
+    return {
+        "upload_id": upload_id,
+        "chunk_size": chunk_size,
+        "total_chunks": chunked_upload.chunk_count(body.size, chunk_size),
+        "expires_after_idle_hours": chunked_upload.UPLOAD_SESSION_TTL_HOURS
+    }
+
+
+@app.get("/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str, authorization: str = Header(None)):
+    """Upload progress, including which chunks are still missing (to resume)"""
+    username = await get_current_user(authorization)
+    return upload_status(await get_upload_session_or_404(upload_id, username))
+
+
+@app.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    authorization: str = Header(None),
+    x_chunk_sha256: Optional[str] = Header(None)
+):
+    """Store one chunk (raw request body). Re-sending a chunk overwrites it."""
+    username = await get_current_user(authorization)
+    session = await get_upload_session_or_404(upload_id, username)
+    
+    if session["completing"]:
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+    
+    total = chunked_upload.chunk_count(session["size"], session["chunk_size"])
+    if not 0 <= index < total:
+        raise HTTPException(status_code=400, detail=f"Chunk index must be between 0 and {total - 1}")
+    sha256 = (x_chunk_sha256 or "").lower()
+    if not chunked_upload.is_sha256(sha256):
+        raise HTTPException(status_code=400, detail="X-Chunk-SHA256 header with the chunk's hex SHA-256 is required")
+    
+    # Only ever one chunk in memory
+    expected = chunked_upload.chunk_length(index, session["size"], session["chunk_size"])
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > expected:
+            raise HTTPException(status_code=413, detail=f"Chunk {index} must be {expected} bytes")
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected} bytes")
+    
+    # Registered first: once a complete has claimed the session, no chunk may touch the part file
+    if not await adb.begin_upload_chunk(upload_id, index):
+        raise HTTPException(status_code=409, detail="Upload is being completed, or no longer exists")
+    written = False
+    try:
+        written = await asyncio.to_thread(
+            chunked_upload.write_chunk, upload_id, index * session["chunk_size"], bytes(data), sha256
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    finally:
+        received = await adb.end_upload_chunk(upload_id, index, sha256 if written else None)
+    if not written:
+        raise HTTPException(status_code=422, detail=f"Chunk {index} does not match its SHA-256; send it again")
+    
+    return {"upload_id": upload_id, "index": index, "received_chunks": received, "total_chunks": total}
+
+
+@app.post("/uploads/{upload_id}/complete")
+@limiter.limit("10/minute")
+async def complete_chunked_upload(
+    request: Request,
+    upload_id: str,
+    authorization: str = Header(None)
+):
+    """Assemble the chunks and classify the document like /upload-documents"""
+    username = await get_current_user(authorization)
+    status = upload_status(await get_upload_session_or_404(upload_id, username))
+    if status["missing"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(status['missing'])} of {status['total_chunks']} chunks are missing"
+        )
+    
+    # Claiming marks the session as completing, so a repeated complete can't process it twice
+    session = await adb.claim_upload_session(upload_id, username)
+    if not session:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is already being completed, has a chunk still uploading, or no longer exists"
+        )
+    try:
+        # Verified by streaming the part file; a mismatch keeps the upload so chunks can be resent
+        if session["sha256"]:
+            digest = await asyncio.to_thread(chunked_upload.hash_part, upload_id)
+            if digest != session["sha256"]:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Assembled file does not match its SHA-256; resend the chunks and complete again"
+                )
+        
+        # Extraction needs the whole document in memory
+        content = await asyncio.to_thread(chunked_upload.read_part, upload_id)
+        file_ext = get_file_extension(session["filename"])
+        result = await process_upload(username, session["filename"], file_ext, content)
+    except BaseException:
+        await adb.release_upload_session(upload_id)
+        raise
+    
+    await adb.finish_upload_session(upload_id)
+    await asyncio.to_thread(chunked_upload.remove_part, upload_id)
+    logger.info(f"User {username} completed chunked upload of {session['filename']} ({session['size']} bytes)")
+    return {"message": "Classified 1 document", "results": [result]}
+
+
+@app.delete("/uploads/{upload_id}")
+async def cancel_chunked_upload(upload_id: str, authorization: str = Header(None)):
+    """Abandon an upload and delete its partial data"""
+    username = await get_current_user(authorization)
+    session = await adb.claim_upload_session(upload_id, username) if chunked_upload.is_upload_id(upload_id) else None
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    await adb.finish_upload_session(upload_id)
+    await asyncio.to_thread(chunked_upload.remove_part, upload_id)
+    return {"message": "Upload cancelled"}
 
 
 @app.get("/categories")
-async def get_categories(authorization: str = Header(None)):
+async def get_categories(
+    authorization: str = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """Get document categories with counts"""
-    username = get_current_user(authorization)
+    username = await get_current_user(authorization)
+    
+    cache_headers = await library_cache_headers(username)
+    if etag_matches(if_none_match, cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
     
     # Get counts from database
-    db_categories = db.get_user_categories(username)
+    db_categories = await adb.get_user_categories(username)
     
     # Ensure all categories are present
-    categories = {"Resume": 0, "Report": 0, "Legal Document": 0, "Other": 0}
+    categories = {name: 0 for name in CATEGORIES}
     categories.update(db_categories)
     
-    return {"categories": categories}
+    return JSONResponse({"categories": categories}, headers=cache_headers)
 
 
 @app.get("/documents")
-async def get_documents(category: str, authorization: str = Header(None)):
+async def get_documents(
+    category: str,
+    authorization: str = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """Get documents by category"""
-    username = get_current_user(authorization)
+    username = await get_current_user(authorization)
+    
+    # ETags are per-URL, so the library version alone is enough per category
+    cache_headers = await library_cache_headers(username)
+    if etag_matches(if_none_match, cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
+    
+    docs = await adb.get_user_documents(username, category)
+    
+    return JSONResponse({"documents": docs}, headers=cache_headers)
+
+
+@app.get("/dashboard")
+async def get_dashboard(
+    page_size: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=200),
+    authorization: str = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Category counts and the newest documents of every category in one request.
     
-    docs = db.get_user_documents(username, category)
+    has_more[category] is true when the category holds more than page_size
+    documents; fetch the rest with /documents?category=.
+    """
+    username = await get_current_user(authorization)
     
-    return {"documents": docs}
+    # Cheap revalidation first; otherwise the version comes with the data
+    if if_none_match:
+        cache_headers = await library_cache_headers(username)
+        if etag_matches(if_none_match, cache_headers["ETag"]):
+            return Response(status_code=304, headers=cache_headers)
+    
+    dashboard = await adb.get_dashboard(username, page_size)
+    
+    # Ensure all categories are present
+    categories = {name: 0 for name in CATEGORIES}
+    categories.update(dashboard["counts"])
+    
+    return JSONResponse(
+        {
+            "categories": categories,
+            "documents": {name: dashboard["documents"].get(name, []) for name in categories},
+            "has_more": {name: count > page_size for name, count in categories.items()},
+            "page_size": page_size
+        },
+        headers=await library_cache_headers(username, dashboard["version"])
+    )
 
 
 @app.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str, authorization: str = Header(None)):
     """Delete a document"""
-    username = get_current_user(authorization)
+    username = await get_current_user(authorization)
     
-    success = db.delete_document(doc_id, username)
+    success = await adb.delete_document(doc_id, username)
     
     if not success:
         raise HTTPException(status_code=404, detail="Document not found or not authorized")
@@ -284,33 +622,177 @@ async def delete_document(doc_id: str, authorization: str = Header(None)):
     return {"message": "Document deleted successfully", "id": doc_id}
 
 
+@app.post("/documents/bulk-delete")
+async def bulk_delete_documents(body: BulkSelection, authorization: str = Header(None)):
+    """Delete many documents (by IDs or category) in a single transaction"""
+    username = await get_current_user(authorization)
+    
+    deleted = await adb.bulk_delete_documents(username, doc_ids=body.ids, category=body.category)
+    
+    logger.info(f"User {username} bulk-deleted {deleted} documents")
+    return {"message": f"Deleted {deleted} documents", "deleted": deleted}
+
+
+@app.post("/documents/bulk-recategorize")
+async def bulk_recategorize_documents(body: BulkRecategorizeRequest, authorization: str = Header(None)):
+    """Move many documents (by IDs or category) to another category in a single transaction"""
+    username = await get_current_user(authorization)
+    
+    if body.new_category not in CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Unknown category: {body.new_category}")
+    
+    updated = await adb.bulk_recategorize_documents(
+        username, body.new_category, doc_ids=body.ids, category=body.category
+    )
+    
+    logger.info(f"User {username} moved {updated} documents to {body.new_category}")
+    return {"message": f"Moved {updated} documents to {body.new_category}", "updated": updated}
+
+
+@app.get("/documents/{doc_id}/file")
+async def download_original_file(
+    doc_id: str,
+    authorization: str = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Download the original uploaded file, streamed from the blob store (supports Range)"""
+    username = await get_current_user(authorization)
+    
+    doc = await adb.get_document(doc_id)
+    if not doc or doc["username"] != username:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    blob = await adb.get_document_blob(doc_id)
+    path = blob_store.blob_path(blob["hash"]) if blob else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Original file not stored for this document")
+    
+    size = os.path.getsize(path)
+    filename = sanitize_filename(doc["filename"])
+    media_type = MEDIA_TYPES.get(get_file_extension(filename), "application/octet-stream")
+    headers = {
+        # Content-addressed, so the hash is a strong validator
+        "ETag": f'"{blob["hash"]}"',
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        byte_range = blob_store.parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.iter_file_range(path, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
+
+
+@app.get("/documents/{doc_id}/similar")
+async def get_similar_documents(
+    doc_id: str,
+    threshold: float = Query(similarity.SIMILARITY_THRESHOLD, ge=0.5, le=1.0),
+    authorization: str = Header(None)
+):
+    """Find near-duplicates of a document in the user's library"""
+    username = await get_current_user(authorization)
+    
+    doc = await adb.get_document(doc_id)
+    if not doc or doc["username"] != username:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    # Documents uploaded before the index existed have no signature
+    signature = await adb.get_document_signature(doc_id)
+    similar = await adb.find_similar_documents(username, signature, exclude_id=doc_id, threshold=threshold) if signature else []
+    
+    return {"document_id": doc_id, "similar": similar}
+
+
+def export_path(category: str, filename: str) -> str:
+    """Path of a document's text file inside the export ZIP"""
+    return f"{sanitize_filename(category.replace(' ', '_'))}/{sanitize_filename(filename)}.txt"
+
+
 @app.get("/download-zip")
-async def download_zip(authorization: str = Header(None)):
-    """Download all user documents as organized ZIP"""
+async def download_zip(
+    authorization: str = Header(None),
+    cursor: Optional[str] = Query(None, description="X-Export-Cursor from a previous export: only changes since then"),
+    since: Optional[str] = Query(None, description="ISO timestamp: only changes after this time")
+):
+    """Download user documents as organized ZIP.
+    
+    Without cursor/since the whole library is exported. With either, only
+    documents added or moved since then are included; manifest.json lists
+    the paths to delete (apply those first) and the cursor for next time,
+    which is also sent as the X-Export-Cursor header. If the change history
+    no longer reaches back that far, a full export is returned instead
+    ("full": true in the manifest).
+    """
     import io
     import zipfile
-    from fastapi.responses import StreamingResponse
-    
-    username = get_current_user(authorization)
     
-    # Get all documents with content
-    documents = db.get_all_user_documents(username)
+    username = await get_current_user(authorization)
     
-    if not documents:
+    if cursor is not None and since is not None:
+        raise HTTPException(status_code=400, detail="Use either cursor or since, not both")
+    since_version = since_time = None
+    try:
+        if cursor is not None:
+            since_version = int(cursor)
+        if since is not None:
+            since_dt = datetime.fromisoformat(since)
+            if since_dt.tzinfo is None:
+                since_dt = since_dt.replace(tzinfo=timezone.utc)
+            since_time = since_dt.astimezone(timezone.utc).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor or since timestamp")
+    
+    changes = await adb.get_library_changes(username, since_version=since_version, since_time=since_time)
+    documents = changes["documents"]
+    
+    if changes["full"] and not documents:
         raise HTTPException(status_code=404, detail="No documents found")
     
+    manifest = {
+        "full": changes["full"],
+        "cursor": str(changes["version"]),
+        "since": None if changes["full"] else (cursor if cursor is not None else since_time),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "documents": [],
+        "deleted": [
+            {
+                "id": tomb["document_id"],
+                "path": export_path(tomb["category"], tomb["filename"]),
+                "reason": tomb["reason"],
+                "deleted_at": tomb["deleted_at"]
+            }
+            for tomb in changes["deleted"]
+        ]
+    }
+    
     # Create ZIP in memory
     zip_buffer = io.BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         for doc in documents:
-            # Sanitize category and filename for ZIP paths
-            category = sanitize_filename(doc['category'].replace(' ', '_'))
             filename = sanitize_filename(doc['filename'])
             content = doc.get('content', '')
             
             # Create a text file with document info and content
-            file_path = f"{category}/{filename}.txt"
+            file_path = export_path(doc['category'], doc['filename'])
             file_content = f"Document: {filename}\n"
             file_content += f"Category: {doc['category']}\n"
             file_content += f"Confidence: {doc['confidence']*100:.0f}%\n"
@@ -319,17 +801,27 @@ async def download_zip(authorization: str = Header(None)):
             file_content += content if content else "(No text content available)"
             
             zip_file.writestr(file_path, file_content)
+            manifest["documents"].append({"id": doc["id"], "path": file_path, "changed_at": doc["changed_at"]})
+        
+        zip_file.writestr("manifest.json", json.dumps(manifest, indent=2))
     
     zip_buffer.seek(0)
     
     # Sanitize username for filename
     safe_username = sanitize_filename(username)
+    suffix = "" if changes["full"] else f"_changes_{manifest['cursor']}"
     
-    logger.info(f"User {username} downloaded all documents as ZIP")
+    logger.info(
+        f"User {username} downloaded {'all' if changes['full'] else 'changed'} documents as ZIP "
+        f"({len(documents)} documents, {len(manifest['deleted'])} deletions)"
+    )
     return StreamingResponse(
         zip_buffer,
         media_type="application/zip",
-        headers={"Content-Disposition": f"attachment; filename=documents_{safe_username}.zip"}
+        headers={
+            "Content-Disposition": f"attachment; filename=documents_{safe_username}{suffix}.zip",
+            "X-Export-Cursor": manifest["cursor"]
+        }
     )
 
 
@@ -344,16 +836,16 @@ async def summarize_document(
     authorization: str = Header(None)
 ):
     """Generate AI summary for a document using Gemini LLM"""
-    username = get_current_user(authorization)
+    username = await get_current_user(authorization)
     
     # Find the document
-    doc = db.get_document(body.document_id)
+    doc = await adb.get_document(body.document_id)
     
     if not doc or doc["username"] != username:
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Get document text
-    text = db.get_document_text(body.document_id) or ""
+    text = await adb.get_document_text(body.document_id) or ""
     
     if not text or len(text.strip()) < 50:
         return SummarizeResponse(
@@ -363,7 +855,15 @@ async def summarize_document(
     
     # Get LLM service and summarize
     llm = get_llm_service()
-    result = llm.summarize_document(text, doc["filename"])
+    with timed("llm"):
+        if llm.is_available:
+            # Queued behind the RPM/TPM budget; interactive calls go before batch work
+            result = await llm_scheduler.submit(
+                username, llm.summarize_document, text, doc["filename"],
+                tokens=llm.estimate_summary_tokens(text), priority=body.priority
+            )
+        else:
+            result = llm.summarize_document(text, doc["filename"])
     
     return SummarizeResponse(
         success=result["success"],
@@ -380,7 +880,8 @@ async def get_llm_status():
     llm = get_llm_service()
     return {
         "available": llm.is_available,
-        "message": "LLM ready" if llm.is_available else "Add GEMINI_API_KEY to .env file"
+        "message": "LLM ready" if llm.is_available else "Add GEMINI_API_KEY to .env file",
+        "scheduler": await llm_scheduler.stats()
     }
 
 
@@ -404,17 +905,23 @@ async def health_check():
     """Detailed health check for monitoring"""
     try:
         # Test database connection
-        db.get_user("__health_check__")
+        await adb.get_user("__health_check__")
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
     
     llm = get_llm_service()
     
+    try:
+        maintenance = await adb.run_read(db_maintenance.get_last_report)
+    except Exception:
+        maintenance = None
+    
     return {
         "status": "healthy" if db_status == "healthy" else "degraded",
         "database": db_status,
         "llm": "available" if llm.is_available else "unavailable",
+        "maintenance": maintenance,
         "version": "2.2.0"
     }
 
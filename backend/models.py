@@ -32,4 +32,8 @@ class Document(BaseModel):
     category: str
     confidence: float
     text_preview: Optional[str] = None
+    char_count: Optional[int] = None
+    word_count: Optional[int] = None
+    page_count: Optional[int] = None
+    content_hash: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
@@ -1,20 +1,22 @@
 """PDF Text Extraction"""
-from PyPDF2 import PdfReader
 from io import BytesIO
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
-    """Extract text from PDF file"""
+def extract_pdf(pdf_bytes: bytes) -> tuple[str, int | None]:
+    """Extract (text, page count) from a PDF file with a single parse"""
     try:
+        # Imported on first use - PyPDF2 is slow to import and not needed at startup
+        from PyPDF2 import PdfReader
+        
         pdf_file = BytesIO(pdf_bytes)
         reader = PdfReader(pdf_file)
         
         if reader.is_encrypted:
             logger.warning("PDF is encrypted")
-            return ""
+            return "", None
         
         text_content = []
         for page in reader.pages:
@@ -28,7 +30,11 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
         
         full_text = "\n".join(text_content)
         logger.info(f"Extracted {len(full_text)} characters")
-        return full_text
+        return full_text, len(reader.pages)
     except Exception as e:
         logger.error(f"PDF extraction failed: {e}")
-        return ""
\ No newline at end of file
+        return "", None
+
+def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    """Extract text from PDF file"""
+    return extract_pdf(pdf_bytes)[0]
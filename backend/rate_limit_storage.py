@@ -0,0 +1,124 @@
+"""SQLite Rate Limit Storage - shares slowapi counters across worker processes
+
+slowapi's default ``memory://`` storage keeps counters per process, so running
+``uvicorn --workers N`` multiplies every limit by N. Importing this module
+registers a ``sqlite://`` scheme with the ``limits`` library; all workers on
+the host then count against the same file with no external service.
+
+    Limiter(key_func=..., storage_uri="sqlite:///path/to/ratelimit.db")
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "ratelimit.db")
+
+# Fraction of increments that also purge expired counters
+_CLEANUP_PROBABILITY = 0.01
+
+
+class ThreadLocalConnections:
+    """One autocommit WAL connection per thread to a shared SQLite file.
+
+    Nothing touches the file until the first get(), which also runs schema
+    (CREATE ... IF NOT EXISTS) once. Constructing this at import time is
+    therefore free; schema work happens on first use, not per import.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(self.schema)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window rate limit storage backed by a local SQLite file"""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str | None = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # sqlite:///abs/path.db -> /abs/path.db ; sqlite:// -> default file
+        path = uri[len("sqlite://"):] if uri else ""
+        self.path = path or DEFAULT_PATH
+        # slowapi builds the storage while main is imported; the file is only
+        # opened on the first rate-limited request
+        self._connections = ThreadLocalConnections(self.path, """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expiry REAL NOT NULL
+            );
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, reused across calls"""
+        return self._connections.get()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        """Atomically increment a counter, starting a new window if the old one expired"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            """
+            INSERT INTO rate_limits (key, count, expiry) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                count = CASE WHEN expiry <= ? THEN excluded.count ELSE count + excluded.count END,
+                expiry = CASE WHEN expiry <= ? THEN excluded.expiry ELSE expiry END
+            RETURNING count
+            """,
+            (key, amount, now + expiry, now, now)
+        ).fetchone()
+        if random.random() < _CLEANUP_PROBABILITY:
+            conn.execute("DELETE FROM rate_limits WHERE expiry <= ?", (now,))
+        return row[0]
+
+    def get(self, key: str) -> int:
+        row = self._connect().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expiry > ?",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connect().execute(
+            "SELECT expiry FROM rate_limits WHERE key = ?",
+            (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connect().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._connect().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connect().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
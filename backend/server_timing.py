@@ -0,0 +1,100 @@
+"""Server-Timing - per-request stage timings for browser DevTools
+
+The middleware gives each request a RequestTimings collector held in a
+context variable. Code on the request path wraps its stages in
+timed("stage"), and the totals are sent back as a Server-Timing header
+(e.g. "auth;dur=1.3, db;dur=4.2, total;dur=18.0") that DevTools shows
+under the request's Timing tab.
+
+The context is copied into asyncio tasks and asyncio.to_thread workers, so
+stages inside concurrent per-file work are recorded too. Their durations
+are summed, which means a stage can exceed the request's wall time. Each
+block of work is timed under one stage only, so stages do not overlap.
+Work done in another process reports its durations back and the caller
+adds them with record_timing().
+
+The header is off by default, since it shows internal timings to every
+client. When SERVER_TIMING_ENABLED is off the middleware is not installed
+and timed() only does a context variable lookup.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Off by default: the header exposes internal timings to every client
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+class RequestTimings:
+    """Accumulated milliseconds per stage for one request"""
+
+    __slots__ = ("stages", "_lock")
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        # Worker threads of the same request can report at the same time
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000
+
+    def header(self, total_seconds: float) -> str:
+        metrics = [f"{stage};dur={ms:.1f}" for stage, ms in self.stages.items()]
+        metrics.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("server_timing", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """Add the wall time of the block to stage, if the request is being timed"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage, time.perf_counter() - start)
+
+
+def record_timing(stage: str, seconds: float):
+    """Add a duration measured elsewhere (e.g. in a worker process) to stage"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware: sets up the collector and writes the header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            # Streaming bodies report the stages finished before the first byte
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header(time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
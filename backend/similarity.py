@@ -0,0 +1,92 @@
+"""Near-Duplicate Detection using MinHash signatures and LSH banding
+
+Each document gets a MinHash signature over its word shingles. The signature
+is split into bands; documents sharing any band bucket are candidates, and
+candidates are confirmed by their estimated Jaccard similarity. Lookups only
+touch the matching buckets, so they stay fast as the library grows.
+
+Only the MAX_SHINGLES smallest shingle hashes of a document are permuted.
+The same rule applies to every document, so the selection is a consistent
+sample of the whole text. That bounds the MinHash work at
+NUM_PERM * MAX_SHINGLES multiplies however long the document is.
+"""
+import hashlib
+import heapq
+import os
+import random
+import re
+from array import array
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MAX_SHINGLES = 1024
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed: signatures must be comparable across processes and restarts
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> set:
+    """64-bit hashes of the word shingles of a text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in shingles
+    }
+
+
+def compute_signature(text: str) -> list | None:
+    """MinHash signature (NUM_PERM 32-bit values), or None for empty text.
+
+    Cost is linear in the text for shingle hashing plus at most
+    NUM_PERM * MAX_SHINGLES (65k) permutations.
+    """
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return None
+    if len(hashes) > MAX_SHINGLES:
+        hashes = heapq.nsmallest(MAX_SHINGLES, hashes)
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def signature_to_bytes(signature: list) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def signature_from_bytes(data: bytes) -> list:
+    values = array("I")
+    values.frombytes(data)
+    return values.tolist()
+
+
+def band_buckets(signature: list) -> list:
+    """(band, bucket) pairs for the LSH index; bucket is a signed 64-bit int for SQLite"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(array("I", rows).tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def estimate_similarity(sig_a: list, sig_b: list) -> float:
+    """Estimated Jaccard similarity: fraction of matching MinHash values"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
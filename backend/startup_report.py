@@ -0,0 +1,113 @@
+"""Cold Start Report - import-time breakdown and startup budget check for CI
+
+Usage:
+    python startup_report.py [--budget-ms 2000] [--top 15]
+
+Spawns a fresh interpreter (so nothing is cached in sys.modules), imports
+main with `-X importtime`, runs the app's lifespan startup, and prints the
+slowest top-level imports. Exits with status 1 when the total cold start
+exceeds the budget, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUDGET_MS = int(os.getenv("STARTUP_BUDGET_MS", "2000"))
+
+# Runs in the child interpreter: time the import and the lifespan startup separately
+_CHILD_CODE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def _startup():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(_startup())
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t2 - t1) * 1000}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) tuples"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def top_level_breakdown(entries: list) -> dict:
+    """Cumulative time per module imported directly by main (or any backend module)"""
+    main_depth = next((depth for name, _, _, depth in entries if name == "main"), None)
+    if main_depth is None:
+        return {}
+    breakdown = {}
+    for name, _, cumulative_us, depth in entries:
+        if depth == main_depth + 1:
+            breakdown[name] = breakdown.get(name, 0) + cumulative_us
+    return breakdown
+
+
+def run_report(top: int) -> dict:
+    """Measure a cold start in a subprocess and return the report"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{proc.stderr[-2000:]}")
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    breakdown = top_level_breakdown(parse_importtime(proc.stderr))
+    slowest = sorted(breakdown.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    return {
+        "import_ms": round(timings["import_ms"], 1),
+        "lifespan_ms": round(timings["lifespan_ms"], 1),
+        "total_ms": round(timings["import_ms"] + timings["lifespan_ms"], 1),
+        "slowest_imports": [{"module": name, "ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report cold-start time of the API")
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS, help="Fail if total startup exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_report(args.top)
+    report["budget_ms"] = args.budget_ms
+    report["within_budget"] = report["total_ms"] <= args.budget_ms
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Import main:      {report['import_ms']:8.1f} ms")
+        print(f"Lifespan startup: {report['lifespan_ms']:8.1f} ms")
+        print(f"Total cold start: {report['total_ms']:8.1f} ms (budget {args.budget_ms} ms)")
+        print("\nSlowest imports from main:")
+        for item in report["slowest_imports"]:
+            print(f"  {item['ms']:8.1f} ms  {item['module']}")
+        print("\n[OK] Within budget" if report["within_budget"] else "\n[FAIL] Cold start over budget")
+
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
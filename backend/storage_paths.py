@@ -0,0 +1,10 @@
+"""Default Locations of on-disk data
+
+DB_PATH moves the database (e.g. onto a mounted volume). The blob store and
+chunked upload directories default to sitting beside it, so one directory
+holds all persistent data; BLOB_DIR and UPLOAD_DIR still override each.
+"""
+import os
+
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.db"))
+DATA_DIR = os.path.dirname(os.path.abspath(DB_PATH))
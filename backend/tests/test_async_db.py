@@ -0,0 +1,34 @@
+import asyncio
+
+import async_db as adb
+import database as db
+
+
+def _document(doc_id: str) -> dict:
+    return dict(doc_id=doc_id, username="alice", filename=f"{doc_id}.pdf", category="Report",
+                confidence=0.9, timestamp="2024-01-01T00:00:00", text="some text " * 10)
+
+
+def test_cancelled_insert_does_not_stall_its_batch(fresh_db):
+    async def scenario():
+        writer = adb.GroupCommitWriter(max_delay_ms=50)
+        adb.writer, original = writer, adb.writer
+        writer.start()
+        try:
+            kept = asyncio.create_task(adb.add_document(**_document("kept")))
+            dropped = asyncio.create_task(adb.add_document(**_document("dropped")))
+            await asyncio.sleep(0.01)  # both queued inside the same batch window
+            dropped.cancel()
+
+            await asyncio.wait_for(kept, timeout=5)
+            assert writer.running
+            # The writer keeps serving later writes
+            await asyncio.wait_for(adb.add_document(**_document("later")), timeout=5)
+        finally:
+            await writer.stop()
+            adb.writer = original
+
+    asyncio.run(scenario())
+    assert db.get_document("kept") is not None
+    assert db.get_document("later") is not None
+    assert db.get_document("dropped") is None
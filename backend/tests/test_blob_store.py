@@ -0,0 +1,39 @@
+import importlib
+
+import pytest
+
+import blob_store
+import chunked_upload
+import storage_paths
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-3", (0, 3)),
+    ("bytes=5-", (5, 9)),
+    ("bytes=-4", (6, 9)),
+    ("bytes=2-100", (2, 9)),
+    ("bytes=5-2", None),
+    ("bytes=0-1,4-5", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert blob_store.parse_range(header, 10) == expected
+
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        blob_store.parse_range("bytes=10-12", 10)
+
+
+def test_data_dirs_default_to_the_database_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "data" / "app.db"))
+    monkeypatch.delenv("BLOB_DIR", raising=False)
+    monkeypatch.delenv("UPLOAD_DIR", raising=False)
+    try:
+        importlib.reload(storage_paths)
+        assert importlib.reload(blob_store).BLOB_DIR == str(tmp_path / "data" / "blobs")
+        assert importlib.reload(chunked_upload).UPLOAD_DIR == str(tmp_path / "data" / "uploads")
+    finally:
+        monkeypatch.undo()
+        for module in (storage_paths, blob_store, chunked_upload):
+            importlib.reload(module)
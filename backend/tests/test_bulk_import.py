@@ -0,0 +1,67 @@
+import hashlib
+import json
+import sqlite3
+
+import blob_store
+import bulk_import
+import database as db
+
+
+def _result(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    content_hash = hashlib.sha256(data).hexdigest()
+    blob_store.put_blob(content_hash, data)
+    return {
+        "status": "ok", "path": str(path), "filename": name, "category": "Report",
+        "confidence": 0.9, "text": "text", "metadata": {"content_hash": content_hash},
+        "signature": None,
+    }
+
+
+def _manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _document_count():
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_replayed_batch_does_not_duplicate_documents(fresh_db, tmp_path):
+    results = [_result(tmp_path, "a.pdf", b"first"), _result(tmp_path, "b.pdf", b"second")]
+    # Crash after the database commit: the manifest never saw the batch
+    first = bulk_import.BulkImporter("alice", str(tmp_path / "lost.jsonl"))
+    for result in results:
+        first.add(result)
+    db.add_documents_batch(first.pending, skip_existing=True)
+
+    rerun = bulk_import.BulkImporter("alice", str(tmp_path / "manifest.jsonl"))
+    for result in results:
+        rerun.add(result)
+    rerun.flush()
+
+    assert _document_count() == 2
+    assert [entry["id"] for entry in _manifest(tmp_path / "manifest.jsonl")] == \
+        [doc["doc_id"] for doc in first.pending]
+
+
+def test_database_error_marks_batch_failed(fresh_db, tmp_path, monkeypatch):
+    def broken_batch(documents, skip_existing=False):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "add_documents_batch", broken_batch)
+    importer = bulk_import.BulkImporter("alice", str(tmp_path / "manifest.jsonl"))
+    importer.add(_result(tmp_path, "a.pdf", b"first"))
+    importer.add({"status": "skipped", "path": str(tmp_path / "empty.pdf"), "error": "No text"})
+    importer.flush()
+
+    entries = _manifest(tmp_path / "manifest.jsonl")
+    assert [entry["status"] for entry in entries] == ["failed", "skipped"]
+    assert "database is locked" in entries[0]["error"]
+    assert importer.stats == {"imported": 0, "skipped": 1, "failed": 1}
+    assert importer.pending == [] and importer.pending_entries == []
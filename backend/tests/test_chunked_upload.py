@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import database as db
+
+
+def _session(upload_id="a" * 32):
+    db.create_upload_session(upload_id, "alice", "big.pdf", size=10, chunk_size=5)
+    return upload_id
+
+
+def test_claim_waits_for_chunk_writes_in_progress(fresh_db):
+    upload_id = _session()
+    assert db.begin_upload_chunk(upload_id, 0)
+
+    assert db.claim_upload_session(upload_id, "alice") is None
+    assert db.end_upload_chunk(upload_id, 0, "f" * 64) == 1
+    assert db.claim_upload_session(upload_id, "alice") is not None
+    # Claimed: late chunks are turned away before touching the part file
+    assert not db.begin_upload_chunk(upload_id, 1)
+
+
+def test_failed_write_does_not_count_as_received(fresh_db):
+    upload_id = _session()
+    db.begin_upload_chunk(upload_id, 0)
+    assert db.end_upload_chunk(upload_id, 0, None) == 0
+    assert db.get_upload_session(upload_id, "alice")["received"] == []
+
+
+def test_abandoned_chunk_write_does_not_block_completion(fresh_db, monkeypatch):
+    upload_id = _session()
+    db.begin_upload_chunk(upload_id, 0)
+    monkeypatch.setattr(db, "CHUNK_WRITE_TIMEOUT_SECONDS", -1)
+    assert db.claim_upload_session(upload_id, "alice") is not None
+
+
+def test_claimed_session_survives_expiry_pass(fresh_db):
+    upload_id = _session()
+    idle_since = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    with db.get_db() as conn:
+        conn.execute("UPDATE upload_sessions SET updated_at = ?", (idle_since,))
+        conn.commit()
+    db.claim_upload_session(upload_id, "alice")
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
+    assert db.delete_expired_upload_sessions(cutoff) == []
+    assert db.get_upload_session(upload_id, "alice")["completing"] == 1
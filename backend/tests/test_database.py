@@ -0,0 +1,167 @@
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import blob_store
+import database as db
+import similarity
+
+
+def _document(doc_id, data, **extra):
+    return {
+        "doc_id": doc_id, "username": "alice", "filename": f"{doc_id}.pdf", "category": "Report",
+        "confidence": 0.9, "timestamp": "2026-01-01T00:00:00", "text": "text",
+        "metadata": {"content_hash": hashlib.sha256(data).hexdigest()}, **extra,
+    }
+
+
+def test_batch_stores_blobs_from_content_and_content_path(fresh_db, tmp_path):
+    original = tmp_path / "original.pdf"
+    original.write_bytes(b"from disk")
+    blob_store.put_blob(hashlib.sha256(b"from disk").hexdigest(), b"from disk")
+
+    db.add_documents_batch([
+        _document("a", b"in memory", content=b"in memory"),
+        _document("b", b"from disk", content_path=str(original)),
+    ])
+
+    for doc_id, content in (("a", b"in memory"), ("b", b"from disk")):
+        blob = db.get_document_blob(doc_id)
+        assert blob["size"] == len(content)
+        assert os.path.exists(blob_store.blob_path(blob["hash"]))
+
+
+def test_blob_collected_before_commit_is_restored(fresh_db, tmp_path):
+    original = tmp_path / "original.pdf"
+    original.write_bytes(b"collected")
+    content_hash = hashlib.sha256(b"collected").hexdigest()
+    # The worker wrote the blob, then a concurrent delete collected it
+    blob_store.put_blob(content_hash, b"collected")
+    blob_store.remove_blob(content_hash)
+
+    db.add_documents_batch([_document("c", b"collected", content_path=str(original))])
+
+    with open(blob_store.blob_path(content_hash), "rb") as f:
+        assert f.read() == b"collected"
+
+
+def test_changed_at_migration_converts_local_time_to_utc(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "legacy.db"))
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute("""CREATE TABLE documents (id TEXT PRIMARY KEY, username TEXT, filename TEXT,
+                    category TEXT, confidence REAL, timestamp TEXT)""")
+    conn.executemany("INSERT INTO documents VALUES (?, 'alice', 'a.pdf', 'Report', 0.9, ?)",
+                     [("local", "2026-01-15T10:30:00"), ("garbled", "not a date")])
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    conn = sqlite3.connect(db.DB_PATH)
+    changed = dict(conn.execute("SELECT id, changed_at FROM documents"))
+    conn.close()
+    expected = datetime.fromisoformat("2026-01-15T10:30:00").astimezone(timezone.utc)
+    assert datetime.fromisoformat(changed["local"]) == expected
+    assert datetime.fromisoformat(changed["garbled"]).tzinfo is not None
+
+
+def _count(sql, *params):
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        return conn.execute(sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_bulk_operations_only_touch_owned_documents(fresh_db):
+    db.create_user("bob", "bob@example.com", "hash")
+    signature = similarity.compute_signature("quarterly revenue report " * 20)
+    db.add_documents_batch([
+        _document("a1", b"shared", content=b"shared", signature=signature),
+        _document("a2", b"alice only", content=b"alice only", signature=signature),
+        _document("b1", b"shared", content=b"shared", signature=signature, username="bob"),
+    ])
+
+    assert db.bulk_recategorize_documents("alice", "Legal Document", doc_ids=["a2", "b1"]) == 1
+    assert db.get_document("a2")["category"] == "Legal Document"
+    assert db.get_document("b1")["category"] == "Report"
+
+    assert db.bulk_delete_documents("alice", doc_ids=["a1", "b1"]) == 1
+    assert db.bulk_delete_documents("alice", category="Report") == 0
+    assert db.get_document("b1") is not None
+
+    # The shared blob is still referenced by bob's copy
+    shared = hashlib.sha256(b"shared").hexdigest()
+    assert _count("SELECT ref_count FROM blobs WHERE hash = ?", shared) == 1
+    assert os.path.exists(blob_store.blob_path(shared))
+    assert [match["id"] for match in db.find_similar_documents("bob", signature)] == ["b1"]
+
+    assert db.bulk_delete_documents("alice", category="Legal Document") == 1
+    alice_only = hashlib.sha256(b"alice only").hexdigest()
+    assert _count("SELECT COUNT(*) FROM blobs WHERE hash = ?", alice_only) == 0
+    assert not os.path.exists(blob_store.blob_path(alice_only))
+    assert _count("SELECT COUNT(*) FROM lsh_buckets WHERE username = 'alice'") == 0
+    assert _count("SELECT COUNT(*) FROM document_signatures WHERE document_id LIKE 'a%'") == 0
+    assert db.find_similar_documents("alice", signature) == []
+
+
+def test_library_changes_since_cursor_or_time_with_tombstones(fresh_db):
+    db.add_documents_batch([_document("a", b"a"), _document("b", b"b")])
+    cursor = db.get_library_changes("alice")["version"]
+    since = datetime.now(timezone.utc).isoformat()
+
+    db.bulk_recategorize_documents("alice", "Legal Document", doc_ids=["a"])
+    db.delete_document("b", "alice")
+    db.add_documents_batch([_document("c", b"c")])
+
+    for changes in (db.get_library_changes("alice", since_version=cursor),
+                    db.get_library_changes("alice", since_time=since)):
+        assert not changes["full"]
+        assert changes["version"] == cursor + 3
+        assert sorted((d["id"], d["category"]) for d in changes["documents"]) == \
+            [("a", "Legal Document"), ("c", "Report")]
+        assert [(t["document_id"], t["category"], t["reason"]) for t in changes["deleted"]] == \
+            [("a", "Report", "moved"), ("b", "Report", "deleted")]
+
+    latest = db.get_library_changes("alice", since_version=cursor + 3)
+    assert not latest["full"] and latest["documents"] == [] and latest["deleted"] == []
+    # A cursor from another library (ahead of this one) cannot be trusted
+    assert db.get_library_changes("alice", since_version=cursor + 10)["full"]
+
+
+def test_library_changes_fall_back_to_full_after_pruning(fresh_db):
+    import db_maintenance
+
+    db.add_documents_batch([_document("a", b"a"), _document("b", b"b")])
+    cursor = db.get_library_changes("alice")["version"]
+    db.delete_document("b", "alice")
+    expired = (datetime.now(timezone.utc) - timedelta(days=db_maintenance.EXPORT_TOMBSTONE_RETENTION_DAYS + 1))
+    with db.get_db() as conn:
+        conn.execute("UPDATE document_tombstones SET deleted_at = ?", (expired.isoformat(),))
+        conn.commit()
+        assert db_maintenance._prune_tombstones(conn, batch_rows=10, pause=lambda: None) == 1
+
+    # Both reach back past the pruned tombstone (the time is before the retention cutoff)
+    for changes in (db.get_library_changes("alice", since_version=cursor),
+                    db.get_library_changes("alice", since_time=(expired - timedelta(days=1)).isoformat())):
+        assert changes["full"]
+        assert [d["id"] for d in changes["documents"]] == ["a"]
+        assert changes["deleted"] == []
+    # Cursors and times after the pruned tombstone still get increments
+    assert not db.get_library_changes("alice", since_version=cursor + 1)["full"]
+    assert not db.get_library_changes("alice", since_time=datetime.now(timezone.utc).isoformat())["full"]
+
+
+def test_dashboard_returns_newest_window_per_category(fresh_db):
+    db.add_documents_batch(
+        [_document(f"r{i}", b"r", timestamp=f"2026-01-0{i}T00:00:00") for i in range(1, 5)]
+        + [_document("l1", b"l", category="Legal Document")]
+    )
+
+    dashboard = db.get_dashboard("alice", page_size=2)
+
+    assert dashboard["counts"] == {"Report": 4, "Legal Document": 1}
+    assert [d["id"] for d in dashboard["documents"]["Report"]] == ["r4", "r3"]
+    assert [d["id"] for d in dashboard["documents"]["Legal Document"]] == ["l1"]
+    assert dashboard["version"][0] == db.get_library_version("alice")[0]
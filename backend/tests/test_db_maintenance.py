@@ -0,0 +1,91 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import blob_store
+import database as db
+import db_maintenance
+
+
+def _old(path, seconds=2 * db_maintenance.STRAY_FILE_MIN_AGE_SECONDS):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_tombstones_are_pruned_in_batches_with_watermark(fresh_db):
+    old = (datetime.now(timezone.utc) - timedelta(days=db_maintenance.EXPORT_TOMBSTONE_RETENTION_DAYS + 1)).isoformat()
+    recent = datetime.now(timezone.utc).isoformat()
+    with db.get_db() as conn:
+        conn.execute("INSERT INTO library_versions (username, version, updated_at) VALUES ('alice', 9, ?)", (recent,))
+        conn.executemany(
+            "INSERT INTO document_tombstones VALUES (?, 'alice', 'f.pdf', 'Report', 'deleted', ?, ?)",
+            [(f"d{v}", v, old) for v in range(1, 6)] + [("d8", 8, recent)]
+        )
+        conn.commit()
+
+        pruned = db_maintenance._prune_tombstones(conn, batch_rows=2, pause=lambda: None)
+
+        assert pruned == 5
+        assert [row[0] for row in conn.execute("SELECT version FROM document_tombstones")] == [8]
+        assert conn.execute("SELECT pruned_version FROM library_versions").fetchone()[0] == 5
+
+
+def test_blob_repair_and_collection_in_batches(fresh_db):
+    hashes = [f"{i:064x}" for i in range(5)]
+    for h in hashes:
+        blob_store.put_blob(h, b"x" * 10)
+    with db.get_db() as conn:
+        # Counts drifted: nothing references any of these blobs
+        conn.executemany("INSERT INTO blobs (hash, size, ref_count) VALUES (?, 10, 3)", [(h,) for h in hashes])
+        conn.commit()
+
+        report = db_maintenance._repair_blobs(conn, batch_rows=2, pause=lambda: None)
+
+        assert report == {"ref_counts_repaired": 5, "blobs_collected": 5, "bytes_freed": 50}
+        assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
+    assert not any(os.path.exists(blob_store.blob_path(h)) for h in hashes)
+
+
+def test_stray_files_are_removed_but_referenced_and_recent_ones_kept(fresh_db):
+    kept, stray, recent = (f"{i:064x}" for i in (1, 2, 3))
+    for h in (kept, stray, recent):
+        blob_store.put_blob(h, b"data")
+    leftover = os.path.join(os.path.dirname(blob_store.blob_path(stray)), ".tmp-crashed")
+    open(leftover, "wb").close()
+    for path in (blob_store.blob_path(kept), blob_store.blob_path(stray), leftover):
+        _old(path)
+    with db.get_db() as conn:
+        conn.execute("INSERT INTO blobs (hash, size, ref_count) VALUES (?, 4, 1)", (kept,))
+        conn.commit()
+
+        report = db_maintenance._remove_stray_blob_files(conn, pause=lambda: None)
+
+    assert report == {"files_removed": 2, "bytes_freed": 4}
+    assert os.path.exists(blob_store.blob_path(kept))
+    assert os.path.exists(blob_store.blob_path(recent))
+    assert not os.path.exists(blob_store.blob_path(stray))
+    assert [name for name, _ in blob_store.iter_stored_files() if name.startswith(".")] == []
+
+
+def test_stop_waits_for_a_running_pass(monkeypatch):
+    started, finished = threading.Event(), threading.Event()
+
+    def slow_pass(interval_minutes, stop):
+        started.set()
+        stop.wait(5)
+        time.sleep(0.05)
+        finished.set()
+
+    monkeypatch.setattr(db_maintenance, "run_if_due", slow_pass)
+    monkeypatch.setattr(db_maintenance, "POLL_SECONDS", 0)
+
+    async def run():
+        task = db_maintenance.MaintenanceTask()
+        task.start()
+        await asyncio.to_thread(started.wait, 2)
+        await task.stop()
+        return finished.is_set()
+
+    assert asyncio.run(run())
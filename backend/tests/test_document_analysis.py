@@ -0,0 +1,44 @@
+import asyncio
+import io
+from concurrent.futures.process import BrokenProcessPool
+
+import docx
+import pytest
+
+from document_analysis import AnalysisPool
+
+
+def _docx(text):
+    buffer = io.BytesIO()
+    document = docx.Document()
+    document.add_paragraph(text)
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+REPORT = _docx("Quarterly report with analysis, findings and recommendations. " * 5)
+
+
+def test_pool_analyzes_in_worker_and_restarts_after_crash():
+    async def scenario():
+        pool = AnalysisPool(workers=1)
+        pool.start()
+        try:
+            analysis = await pool.analyze("report.docx", ".docx", REPORT)
+            assert analysis["category"] == "Report"
+            assert analysis["metadata"]["content_hash"]
+
+            for process in list(pool._executor._processes.values()):
+                process.kill()
+            with pytest.raises(BrokenProcessPool):
+                await pool.analyze("report.docx", ".docx", REPORT)
+
+            assert (await pool.analyze("report.docx", ".docx", REPORT))["category"] == "Report"
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_unstarted_pool_runs_inline_and_skips_short_text():
+    assert asyncio.run(AnalysisPool().analyze("short.docx", ".docx", _docx("too short"))) is None
@@ -0,0 +1,48 @@
+import io
+import zipfile
+
+from docx_utils import _extract_streaming
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+MC = 'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+
+
+def _paragraph(text):
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _docx(body, parts=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W} {MC}><w:body>{body}</w:body></w:document>")
+        for name, xml in (parts or {}).items():
+            archive.writestr(name, xml)
+    return buffer.getvalue()
+
+
+def test_text_box_fallback_is_not_repeated():
+    text_box = (
+        "<w:p><w:r><w:t>Anchor</w:t></w:r><w:r><mc:AlternateContent>"
+        f"<mc:Choice><w:txbxContent>{_paragraph('Boxed')}</w:txbxContent></mc:Choice>"
+        f"<mc:Fallback><w:pict><w:txbxContent>{_paragraph('Boxed')}</w:txbxContent></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p>"
+    )
+
+    assert _extract_streaming(_docx(text_box + _paragraph("After")))[0].split("\n") == ["Boxed", "Anchor", "After"]
+
+
+def test_headers_and_footers_in_numeric_order():
+    parts = {f"word/{kind}{n}.xml": f"<w:{root} {W}>{_paragraph(f'{kind} {n}')}</w:{root}>"
+             for kind, root in (("header", "hdr"), ("footer", "ftr")) for n in (10, 2, 1)}
+
+    text = _extract_streaming(_docx(_paragraph("Body"), parts))[0]
+
+    assert text.split("\n") == ["header 1", "header 2", "header 10", "Body", "footer 1", "footer 2", "footer 10"]
+
+
+def test_page_count_read_with_text():
+    app = ('<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+           '<Pages>3</Pages></Properties>')
+
+    assert _extract_streaming(_docx(_paragraph("Body"), {"docProps/app.xml": app})) == ("Body", 3)
+    assert _extract_streaming(_docx(_paragraph("Body"))) == ("Body", None)
@@ -0,0 +1,86 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database as db
+import main
+from auth import create_token
+
+
+def _add(doc_id, category="Report"):
+    db.add_document(doc_id, "alice", f"{doc_id}.pdf", category, 0.9, "2026-01-01T00:00:00", "text")
+
+
+@pytest.fixture
+def client(fresh_db):
+    # No lifespan: the test writes through database.py, the API only reads
+    client = TestClient(main.app)
+    client.headers["Authorization"] = f"Bearer {create_token('alice')}"
+    return client
+
+
+@pytest.mark.parametrize("path", ["/categories", "/documents?category=Report", "/dashboard"])
+def test_etag_revalidates_until_library_changes(client, path):
+    _add("a")
+    etag = client.get(path).headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    for change in (lambda: _add("b"),
+                   lambda: db.bulk_recategorize_documents("alice", "Legal Document", doc_ids=["a"]),
+                   lambda: db.delete_document("b", "alice")):
+        change()
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        etag = response.headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+
+
+def test_noop_move_keeps_etag(client):
+    _add("a")
+    etag = client.get("/categories").headers["ETag"]
+
+    assert db.bulk_recategorize_documents("alice", "Legal Document", doc_ids=["missing"]) == 0
+
+    assert client.get("/categories", headers={"If-None-Match": etag}).status_code == 304
+
+
+def _export(client, **params):
+    response = client.get("/download-zip", params=params)
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+    assert response.headers["X-Export-Cursor"] == manifest["cursor"]
+    return manifest
+
+
+def test_incremental_export_lists_removed_paths(client):
+    _add("a")
+    _add("b")
+    cursor = _export(client)["cursor"]
+    db.bulk_recategorize_documents("alice", "Legal Document", doc_ids=["a"])
+    db.delete_document("b", "alice")
+
+    manifest = _export(client, cursor=cursor)
+
+    assert manifest["full"] is False and manifest["since"] == cursor
+    assert [d["path"] for d in manifest["documents"]] == ["Legal_Document/a.pdf.txt"]
+    assert [(d["path"], d["reason"]) for d in manifest["deleted"]] == \
+        [("Report/a.pdf.txt", "moved"), ("Report/b.pdf.txt", "deleted")]
+    assert client.get("/download-zip", params={"cursor": "x"}).status_code == 400
+
+
+def test_dashboard_has_more_per_category(client):
+    for i in range(3):
+        _add(f"r{i}")
+    _add("l0", category="Legal Document")
+
+    body = client.get("/dashboard", params={"page_size": 2}).json()
+
+    assert body["categories"] == {"Resume": 0, "Report": 3, "Legal Document": 1, "Other": 0}
+    assert len(body["documents"]["Report"]) == 2 and body["documents"]["Resume"] == []
+    assert body["has_more"] == {"Resume": False, "Report": True, "Legal Document": False, "Other": False}
+    assert client.get("/dashboard", params={"page_size": 0}).status_code == 422
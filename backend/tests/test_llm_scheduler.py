@@ -0,0 +1,140 @@
+import asyncio
+import sqlite3
+import time
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, MemoryQuota, RateLimitedError, SQLiteQuota
+
+
+def test_workers_share_one_quota(tmp_path):
+    path = str(tmp_path / "quota.db")
+    first = SQLiteQuota(path, rpm=2, tpm=1000)
+    second = SQLiteQuota(path, rpm=2, tpm=1000)
+
+    assert first.reserve({"requests": 1, "tokens": 100}) == 0
+    assert second.reserve({"requests": 1, "tokens": 100}) == 0
+    # Two calls per minute between both workers: the third waits ~30 s
+    assert second.reserve({"requests": 1, "tokens": 100}) > 25
+    assert first.reserve({"requests": 1, "tokens": 100}) > 25
+    assert round(first.available()["tokens"]) == 800
+
+
+def test_construction_does_no_io(tmp_path):
+    path = tmp_path / "quota.db"
+    LLMScheduler(storage_uri=f"sqlite://{path}")
+    SQLiteQuota(str(path), rpm=1, tpm=1)
+    assert not path.exists()
+
+
+def test_scheduler_dispatches_through_shared_quota(tmp_path):
+    async def run():
+        scheduler = LLMScheduler(rpm=60, tpm=10000, storage_uri=f"sqlite://{tmp_path / 'quota.db'}")
+        scheduler.start()
+        try:
+            started = time.monotonic()
+            results = await asyncio.gather(*(
+                scheduler.submit(user, lambda n=n: n * 2, tokens=10) for n, user in enumerate(["a", "b", "a"])
+            ))
+            return results, time.monotonic() - started, await scheduler.stats()
+        finally:
+            await scheduler.stop()
+
+    results, elapsed, stats = asyncio.run(run())
+    assert results == [0, 2, 4]
+    assert elapsed < 5
+    assert stats["dispatched"] == 3
+    assert stats["quota"]["tokens_available"] < 10000
+
+
+class FlakyQuota(MemoryQuota):
+    """Fails the first reserve, like a locked shared quota file"""
+
+    def __init__(self):
+        super().__init__(rpm=600, tpm=100000)
+        self.failures = 1
+
+    def reserve(self, costs):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().reserve(costs)
+
+
+def test_quota_store_error_does_not_stop_the_dispatcher(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "QUOTA_ERROR_BACKOFF_SECONDS", 0.01)
+
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, storage_uri="memory://")
+        scheduler.quota = FlakyQuota()
+        scheduler.start()
+        try:
+            first = await asyncio.wait_for(scheduler.submit("a", lambda: "ok"), 2)
+            # The slot taken before the failure was released
+            second = await asyncio.wait_for(scheduler.submit("a", lambda: "again"), 2)
+            return first, second, scheduler.running
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(run()) == ("ok", "again", True)
+
+
+def test_rate_limited_call_is_requeued_and_charged_again(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_RETRY_BASE_SECONDS", 0.01)
+    attempts = []
+
+    def call():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimitedError(result={"success": False})
+        return {"success": True}
+
+    async def run():
+        scheduler = LLMScheduler(rpm=3, tpm=100000, storage_uri="memory://")
+        scheduler.start()
+        try:
+            return await asyncio.wait_for(scheduler.submit("a", call, tokens=100), 5), await scheduler.stats()
+        finally:
+            await scheduler.stop()
+
+    result, stats = asyncio.run(run())
+    assert result == {"success": True}
+    assert len(attempts) == 3
+    assert stats["dispatched"] == 3
+    assert stats["rate_limit_retries"] == 2
+    # Every attempt drew a request from the RPM bucket
+    assert stats["quota"]["requests_available"] < 1
+
+
+def test_retries_exhausted_returns_fallback_result(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "LLM_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(llm_scheduler, "LLM_RATE_LIMIT_RETRIES", 1)
+
+    def call():
+        raise RateLimitedError(result={"success": False, "error": "Rate limit reached"})
+
+    async def run():
+        scheduler = LLMScheduler(storage_uri="memory://")
+        scheduler.start()
+        try:
+            return await asyncio.wait_for(scheduler.submit("a", call), 5)
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(run())["error"] == "Rate limit reached"
+
+
+def test_dispatcher_crash_fails_queued_calls():
+    async def run():
+        scheduler = LLMScheduler(rpm=1, storage_uri="memory://")
+        scheduler.start()
+        scheduler.quota.reserve({"requests": 1})  # empty the bucket so the next job waits
+        pending = asyncio.ensure_future(scheduler.submit("a", lambda: "never"))
+        await asyncio.sleep(0.05)
+        scheduler._peek = None  # any bug in the loop
+        scheduler._wakeup.set()
+        try:
+            await asyncio.wait_for(pending, 2)
+        except RuntimeError as e:
+            return str(e), scheduler.running
+
+    assert asyncio.run(run()) == ("LLM scheduler stopped", False)
@@ -0,0 +1,21 @@
+import os
+
+from rate_limit_storage import SQLiteStorage
+
+
+def test_file_is_created_on_first_use_not_construction(tmp_path):
+    path = tmp_path / "ratelimit.db"
+    storage = SQLiteStorage(f"sqlite://{path}")
+    assert not os.path.exists(path)
+
+    assert storage.incr("ip", expiry=60) == 1
+    assert storage.incr("ip", expiry=60, amount=2) == 3
+    assert storage.get("ip") == 3
+    assert os.path.exists(path)
+
+
+def test_expired_window_starts_over(tmp_path):
+    storage = SQLiteStorage(f"sqlite://{tmp_path / 'ratelimit.db'}")
+    storage.incr("ip", expiry=0)
+    assert storage.get("ip") == 0
+    assert storage.incr("ip", expiry=60) == 1
@@ -155,6 +155,8 @@ const SummaryModal = ({ isOpen, onClose, summary, loading, error, filename }) =>
 const OrganizedPage = ({ token, username, onNavigate, onLogout }) => {
     const [categories, setCategories] = useState({});
     const [documents, setDocuments] = useState([]);
+    // First page of each category from /dashboard; null once it may be stale
+    const [pages, setPages] = useState({});
     const [selectedCategory, setSelectedCategory] = useState(null);
     const [loading, setLoading] = useState(true);
     const [searchQuery, setSearchQuery] = useState('');
@@ -164,15 +166,19 @@ const OrganizedPage = ({ token, username, onNavigate, onLogout }) => {
     const toast = useToast();
 
     useEffect(() => {
-        loadCategories();
+        loadDashboard();
     }, []);
 
-    const loadCategories = async () => {
+    const loadDashboard = async () => {
         setLoading(true);
         try {
-            const result = await api.getCategories(token);
+            const result = await api.getDashboard(token);
             if (result.categories) {
                 setCategories(result.categories);
+                setPages(Object.fromEntries(Object.keys(result.categories).map(category => [
+                    category,
+                    result.has_more[category] ? null : result.documents[category]
+                ])));
             }
         } catch (err) {
             console.error('Failed to load categories:', err);
@@ -184,6 +190,11 @@ const OrganizedPage = ({ token, username, onNavigate, onLogout }) => {
     const loadDocuments = async (category) => {
         setSelectedCategory(category);
         setSearchQuery('');
+        // The dashboard already returned the whole category
+        if (pages[category]) {
+            setDocuments(pages[category]);
+            return;
+        }
         try {
             const result = await api.getDocuments(category, token);
             if (result.documents) {
@@ -214,6 +225,7 @@ const OrganizedPage = ({ token, username, onNavigate, onLogout }) => {
             const result = await api.deleteDocument(deleteConfirm.doc.id, token);
             if (result.message) {
                 setDocuments(docs => docs.filter(d => d.id !== deleteConfirm.doc.id));
+                setPages(cached => ({ ...cached, [selectedCategory]: null }));
                 setCategories(cats => ({
                     ...cats,
                     [selectedCategory]: Math.max(0, (cats[selectedCategory] || 1) - 1)
@@ -33,7 +33,7 @@ const TypewriterText = ({ text, speed = 50 }) => {
 };
 
 // Processing Indicator Component with enhanced animations
-const ProcessingIndicator = ({ filesCount }) => (
+const ProcessingIndicator = ({ filesCount, completedCount = 0 }) => (
     <div className="fixed inset-0 bg-brown-800/50 dark:bg-black/60 backdrop-blur-sm flex items-center justify-center z-50 animate-fadeIn">
         <div className="bg-cream-50 dark:bg-dark-300 rounded-2xl p-8 max-w-md w-full mx-4 text-center card-shadow-lg border border-cream-300 dark:border-dark-400 animate-scaleIn glass">
             <div className="relative inline-block">
@@ -46,6 +46,9 @@ const ProcessingIndicator = ({ filesCount }) => (
             </div>
             <h3 className="text-xl font-bold text-brown-700 dark:text-cream-100 mt-6">Processing Documents</h3>
             <p className="text-brown-500 dark:text-cream-300 mt-2">Analyzing {filesCount} document{filesCount !== 1 ? 's' : ''} with AI...</p>
+            {completedCount > 0 && (
+                <p className="text-sm font-medium text-golden-600 dark:text-golden-400 mt-1">{completedCount} of {filesCount} done</p>
+            )}
             <div className="mt-4 text-sm text-brown-400 dark:text-cream-300">
                 <TypewriterText text="Extracting text → Analyzing content → Classifying..." speed={40} />
             </div>
@@ -78,6 +81,7 @@ const UploadPage = ({ token, username, onNavigate, onLogout }) => {
     const [uploading, setUploading] = useState(false);
     const [error, setError] = useState('');
     const [uploadResults, setUploadResults] = useState(null);
+    const [completedCount, setCompletedCount] = useState(0);
     const toast = useToast();
 
     const allowedExtensions = ['.pdf', '.docx'];
@@ -117,14 +121,19 @@ const UploadPage = ({ token, username, onNavigate, onLogout }) => {
 
         setUploading(true);
         setError('');
+        setCompletedCount(0);
 
         try {
-            const result = await api.uploadDocuments(files, token);
+            // Each file's result arrives as soon as it is classified
+            const result = await api.uploadDocumentsStream(files, token, () => {
+                setCompletedCount(count => count + 1);
+            });
             if (result.error || result.detail) {
                 setError(result.error || result.detail);
                 toast.error(result.error || result.detail);
             } else {
-                setUploadResults(result.results);
+                // Lines arrive in completion order; show them in upload order
+                setUploadResults([...result.results].sort((a, b) => a.index - b.index));
                 setFiles([]);
                 toast.success(`Successfully classified ${result.results.length} document${result.results.length > 1 ? 's' : ''}!`);
             }
@@ -142,7 +151,7 @@ const UploadPage = ({ token, username, onNavigate, onLogout }) => {
 
     return (
         <div className="min-h-screen paper-texture">
-            {uploading && <ProcessingIndicator filesCount={files.length} />}
+            {uploading && <ProcessingIndicator filesCount={files.length} completedCount={completedCount} />}
 
             {/* Navigation Bar - Logo is clickable but stays on upload page */}
             <nav className="bg-cream-50/95 dark:bg-dark-300/95 backdrop-blur-sm border-b border-cream-300 dark:border-dark-400 sticky top-0 z-40">
@@ -269,6 +278,11 @@ const UploadPage = ({ token, username, onNavigate, onLogout }) => {
                                             <FileText className="w-5 h-5 text-brown-600 dark:text-cream-200" />
                                             <span className="font-medium text-brown-700 dark:text-cream-100">{result.filename}</span>
                                         </div>
+                                        {result.error ? (
+                                            <span className="px-3 py-1 bg-red-50 dark:bg-red-900/30 text-red-700 dark:text-red-300 rounded-full text-sm font-medium">
+                                                {result.error}
+                                            </span>
+                                        ) : (
                                         <div className="flex items-center gap-3">
                                             <span className="px-3 py-1 bg-brown-100 dark:bg-dark-300 text-brown-700 dark:text-cream-200 rounded-full text-sm font-medium">
                                                 {result.category}
@@ -277,6 +291,7 @@ const UploadPage = ({ token, username, onNavigate, onLogout }) => {
                                                 {(result.confidence * 100).toFixed(0)}%
                                             </span>
                                         </div>
+                                        )}
                                     </div>
                                 ))}
                             </div>
@@ -34,6 +34,104 @@ const api = {
         return res.json();
     },
 
+    // Streams one NDJSON result per file as it finishes; onResult is called for each.
+    // Resolves to { message, results } (results in completion order) or the error body.
+    uploadDocumentsStream: async (files, token, onResult) => {
+        const formData = new FormData();
+        files.forEach(file => formData.append('files', file));
+
+        const res = await fetch(`${API_BASE}/upload-documents?stream=true`, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` },
+            body: formData
+        });
+        if (!res.ok) {
+            return res.json();
+        }
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        const results = [];
+        let message = '';
+        let buffer = '';
+
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            const data = JSON.parse(line);
+            if (data.done) {
+                message = data.message;
+            } else {
+                results.push(data);
+                if (onResult) onResult(data);
+            }
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer);
+
+        return { message, results };
+    },
+
+    // Resumable upload for large files: init, PUT each missing chunk with its SHA-256, then complete.
+    // onProgress(received, total, uploadId) fires after each chunk; pass that uploadId back to resume
+    // after a dropped connection. crypto.subtle needs a secure context (https or localhost).
+    uploadDocumentResumable: async (file, token, onProgress, uploadId = null) => {
+        const auth = { 'Authorization': `Bearer ${token}` };
+        const toHex = (buffer) => Array.from(new Uint8Array(buffer))
+            .map(b => b.toString(16).padStart(2, '0')).join('');
+
+        let status = null;
+        if (uploadId) {
+            const res = await fetch(`${API_BASE}/uploads/${encodeURIComponent(uploadId)}`, { headers: auth });
+            if (res.ok) status = await res.json();
+        }
+        if (!status) {
+            const res = await fetch(`${API_BASE}/uploads`, {
+                method: 'POST',
+                headers: { ...auth, 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename: file.name, size: file.size })
+            });
+            const init = await res.json();
+            if (!res.ok) return init;
+            status = { ...init, missing: [...Array(init.total_chunks).keys()] };
+        }
+
+        for (const index of status.missing) {
+            const start = index * status.chunk_size;
+            const chunk = await file.slice(start, start + status.chunk_size).arrayBuffer();
+            const sha256 = toHex(await crypto.subtle.digest('SHA-256', chunk));
+            const res = await fetch(`${API_BASE}/uploads/${status.upload_id}/chunks/${index}`, {
+                method: 'PUT',
+                headers: { ...auth, 'X-Chunk-SHA256': sha256 },
+                body: chunk
+            });
+            const result = await res.json();
+            if (!res.ok) return { ...result, upload_id: status.upload_id };
+            if (onProgress) onProgress(result.received_chunks, status.total_chunks, status.upload_id);
+        }
+
+        const res = await fetch(`${API_BASE}/uploads/${status.upload_id}/complete`, {
+            method: 'POST',
+            headers: auth
+        });
+        return res.json();
+    },
+
+    // Category counts plus the first page of every category in one request
+    getDashboard: async (token) => {
+        const res = await fetch(`${API_BASE}/dashboard`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        return res.json();
+    },
+
     getCategories: async (token) => {
         const res = await fetch(`${API_BASE}/categories`, {
             headers: { 'Authorization': `Bearer ${token}` }
@@ -73,6 +171,31 @@ const api = {
         return res.json();
     },
 
+    // selection: { ids: [...] } or { category: '...' }
+    bulkDeleteDocuments: async (selection, token) => {
+        const res = await fetch(`${API_BASE}/documents/bulk-delete`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify(selection)
+        });
+        return res.json();
+    },
+
+    bulkRecategorizeDocuments: async (selection, newCategory, token) => {
+        const res = await fetch(`${API_BASE}/documents/bulk-recategorize`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({ ...selection, new_category: newCategory })
+        });
+        return res.json();
+    },
+
     downloadZip: async (token) => {
         const res = await fetch(`${API_BASE}/download-zip`, {
             headers: { 'Authorization': `Bearer ${token}` }
@@ -87,6 +210,22 @@ const api = {
         return res.blob();
     },
 
+    // Incremental export: only documents added or moved since cursor (omit for everything).
+    // manifest.json in the ZIP lists paths to delete; keep the returned cursor for next time.
+    downloadZipChanges: async (cursor, token) => {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const res = await fetch(`${API_BASE}/download-zip${query}`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        if (!res.ok) {
+            const error = await res.json();
+            throw new Error(error.detail || 'Download failed');
+        }
+
+        return { blob: await res.blob(), cursor: res.headers.get('X-Export-Cursor') };
+    },
+
     // Health check endpoint
     healthCheck: async () => {
         try {